@@ -0,0 +1,28 @@
+from typing import Callable
+
+from app.models.change import ChangeEvent
+
+COLLECTIONS = ("recipe", "recipe_cards", "pages", "token_public", "user")
+SUBSCRIBERS: dict[str, list[Callable]] = {}
+
+
+def subscribe(collection: str):
+    # subscribers run on the listener thread and must be thread safe
+    def register(function: Callable) -> Callable:
+        SUBSCRIBERS.setdefault(collection, []).append(function)
+        return function
+
+    return register
+
+
+def publish(event: ChangeEvent):
+    for subscriber in SUBSCRIBERS.get(event.collection, []):
+        try:
+            subscriber(event)
+        except Exception as e:
+            print(e)
+
+
+def publish_reset():
+    for collection in COLLECTIONS:
+        publish(ChangeEvent(collection=collection, operation="reset"))
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.changes import COLLECTIONS, publish, publish_reset
+from app.core import configuration
+from app.core.database import db
+from app.models.change import ChangeEvent
+from app.services.change_token import ChangeTokenService
+
+RETRY_SECONDS = 5
+# the resume token is older than the oplog or no longer usable
+HISTORY_LOST_CODES = (280, 286)
+NOT_REPLICA_SET_CODE = 40573
+
+
+def to_event(change: dict) -> ChangeEvent:
+    description = change.get("updateDescription") or {}
+    return ChangeEvent(
+        collection=change.get("ns", {}).get("coll", ""),
+        operation=change["operationType"],
+        id=(change.get("documentKey") or {}).get("_id"),
+        updated_fields=list(description.get("updatedFields", {}))
+        + description.get("removedFields", []),
+    )
+
+
+class ChangeStreamListener:
+    def __init__(
+        self,
+        name: str = configuration.APP_CHANGES_NAME,
+        collections: tuple = COLLECTIONS,
+        save_seconds: float = configuration.APP_CHANGES_SAVE_SECONDS,
+    ):
+        self.name = name
+        self.collections = collections
+        self.save_seconds = save_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self.name == "":
+            print("APP_CHANGES_NAME is not set, listener stopped")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="change-stream", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        try:
+            token = ChangeTokenService.get(self.name)
+        except PyMongoError as e:
+            print(e)
+            token = None
+        while not self._stop.is_set():
+            try:
+                token = self._watch(token)
+            except OperationFailure as e:
+                if e.code == NOT_REPLICA_SET_CODE:
+                    print("Change streams need a replica set, listener stopped")
+                    return
+                print(e)
+                if e.code in HISTORY_LOST_CODES:
+                    # events were missed, every cache starts over
+                    token = None
+                    ChangeTokenService.delete(self.name)
+                    publish_reset()
+                    continue
+                self._stop.wait(RETRY_SECONDS)
+            except PyMongoError as e:
+                print(e)
+                self._stop.wait(RETRY_SECONDS)
+
+    def _watch(self, token: dict | None) -> dict | None:
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        with db.watch(pipeline, resume_after=token, max_await_time_ms=1000) as stream:
+            saved = time.monotonic()
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    publish(to_event(change))
+                # advances on idle batches too, so a restart resumes close by
+                token = stream.resume_token or token
+                if token is not None and time.monotonic() - saved >= self.save_seconds:
+                    ChangeTokenService.save(self.name, token)
+                    saved = time.monotonic()
+        if token is not None:
+            ChangeTokenService.save(self.name, token)
+        return token
@@ -0,0 +1,17 @@
+from app.changes import subscribe
+from app.models.change import ChangeEvent
+from app.services.recipe_facets import STATE_FIELDS, RecipeFacetService
+
+
+@subscribe("recipe_cards")
+def invalidate_recipe_facets(event: ChangeEvent):
+    # updates that touch no counted field (image variants, sync stamps) leave
+    # the counts as they are; replaces, inserts, deletes and resets do not
+    # say what changed
+    if event.operation == "update" and not any(
+        field.split(".")[0] in STATE_FIELDS for field in event.updated_fields
+    ):
+        return
+    # the snapshot is rebuilt lazily on the next facets request, from the
+    # cards so only once they reflect the change
+    RecipeFacetService.invalidate()
@@ -1,6 +1,130 @@
+import threading
+
 import pymongo
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
 
 from app.core import configuration
+from app.metrics.mongo import CommandMetricsListener
+from app.metrics.slow_query import SlowQueryListener
+
+_client: pymongo.MongoClient | None = None
+_lock = threading.Lock()
+
+ReadPreference = Primary | PrimaryPreferred | Secondary | SecondaryPreferred | Nearest
+READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def create_client() -> pymongo.MongoClient:
+    event_listeners = []
+    if configuration.APP_METRICS_ENABLED:
+        event_listeners.append(CommandMetricsListener())
+    if configuration.APP_SLOW_QUERY_ENABLED:
+        event_listeners.append(SlowQueryListener())
+    return pymongo.MongoClient(
+        configuration.APP_MONGO_URI, event_listeners=event_listeners
+    )
+
+
+def get_client() -> pymongo.MongoClient:
+    # created on first use so importing the app opens no connections
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+
+def get_database() -> Database:
+    return get_client().get_database(configuration.APP_MONGO_DB)
+
+
+def public_read_preference(
+    mode: str = configuration.APP_MONGO_PUBLIC_READ_PREFERENCE,
+    max_staleness: int = configuration.APP_MONGO_PUBLIC_MAX_STALENESS,
+) -> ReadPreference:
+    if mode == "primary":
+        return Primary()
+    if mode in READ_PREFERENCES:
+        return READ_PREFERENCES[mode](max_staleness=max_staleness)
+    raise ValueError(f"Unknown read preference: {mode}")
+
+
+def create_unique_index(collection, keys: list, name: str, **options):
+    # writes rely on the index to reject duplicates, so serving without it
+    # (duplicates or a legacy index on the same keys) is not an option
+    try:
+        collection.create_index(keys, name=name, unique=True, **options)
+    except OperationFailure as e:
+        raise RuntimeError(
+            f"Unique index {collection.name}.{name} could not be created, "
+            f"run python -m app.migrations.unique_indexes: {e}"
+        ) from e
+
+
+def close():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+class LazyCollection:
+    def __init__(self, name: str, read_preference: ReadPreference | None = None):
+        self.name = name
+        self.read_preference = read_preference
+        self._client: pymongo.MongoClient | None = None
+        self._collection: Collection | None = None
+
+    @property
+    def collection(self) -> Collection:
+        client = get_client()
+        if self._client is not client:
+            collection = client.get_database(configuration.APP_MONGO_DB)[self.name]
+            if self.read_preference is not None:
+                collection = collection.with_options(
+                    read_preference=self.read_preference
+                )
+            self._collection = collection
+            self._client = client
+        return self._collection
+
+    def __getattr__(self, name: str):
+        return getattr(self.collection, name)
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self.name!r})"
+
+
+class LazyDatabase:
+    # collections can be bound at import time (TABLE = db.recipe) and
+    # resolve the client only when a command is issued
+    def __getattr__(self, name: str):
+        if name.startswith("_") or hasattr(Database, name):
+            return getattr(get_database(), name)
+        return LazyCollection(name)
+
+    def __getitem__(self, name: str) -> LazyCollection:
+        return LazyCollection(name)
+
+    def public(self, name: str) -> LazyCollection:
+        # reads that tolerate bounded staleness, writes stay on the primary
+        return LazyCollection(name, public_read_preference())
+
 
-client = pymongo.MongoClient(configuration.APP_MONGO_URI)
-db = client.get_database(configuration.APP_MONGO_DB)
+db = LazyDatabase()
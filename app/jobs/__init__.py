@@ -0,0 +1,12 @@
+from typing import Callable
+
+HANDLERS: dict[str, Callable] = {}
+
+
+def handler(name: str):
+    # handlers may run more than once for the same job, they must be idempotent
+    def register(function: Callable) -> Callable:
+        HANDLERS[name] = function
+        return function
+
+    return register
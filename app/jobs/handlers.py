@@ -0,0 +1,22 @@
+from app.jobs import handler
+from app.models.recipe import FileBlob
+from app.services.blob import BlobService
+from app.services.recipe_image import RecipeImageService
+from app.storage import get_storage
+
+
+@handler("storage.delete")
+def delete_files(payload: dict):
+    # files stored before names were unique per copy can be uploaded again
+    # under the same name after the delete was queued
+    if BlobService.get_by_name(payload["name"]) is not None:
+        return
+    storage = get_storage()
+    failed = [name for name in payload["names"] if not storage.delete(name)]
+    if len(failed) > 0:
+        raise RuntimeError(f"Files not deleted: {', '.join(failed)}")
+
+
+@handler("image.variants")
+async def generate_image_variants(payload: dict):
+    await RecipeImageService.generate_variants(FileBlob(**payload["image"]))
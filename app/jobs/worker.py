@@ -0,0 +1,66 @@
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import configuration
+from app.jobs import HANDLERS
+from app.models.job import Job
+from app.services.job import JobService
+
+
+class JobWorker:
+    def __init__(
+        self,
+        concurrency: int = configuration.APP_JOBS_CONCURRENCY,
+        poll_seconds: float = configuration.APP_JOBS_POLL_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._semaphore: asyncio.Semaphore | None = None
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    def start(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, timeout: float = 10):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # unfinished jobs keep their lease and are retried once it expires
+        if len(self._running) > 0:
+            await asyncio.wait(self._running, timeout=timeout)
+
+    async def _loop(self):
+        while True:
+            await self._semaphore.acquire()
+            try:
+                job = await run_in_threadpool(JobService.claim)
+            except Exception as e:
+                print(e)
+                job = None
+            if job is None:
+                self._semaphore.release()
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            task = asyncio.create_task(self._run(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, job: Job):
+        try:
+            handler = HANDLERS.get(job.name)
+            if handler is None:
+                raise LookupError(f"No handler for job {job.name}")
+            if asyncio.iscoroutinefunction(handler):
+                await handler(job.payload)
+            else:
+                await run_in_threadpool(handler, job.payload)
+            await run_in_threadpool(JobService.complete, job)
+        except Exception as e:
+            print(e)
+            await run_in_threadpool(JobService.fail, job, repr(e))
+        finally:
+            self._semaphore.release()
@@ -0,0 +1,30 @@
+from app.core import configuration
+from app.limits.base import RateLimitBackend
+
+_backend: RateLimitBackend | None = None
+
+
+def create_backend(
+    backend: str = configuration.APP_RATE_LIMIT_BACKEND,
+) -> RateLimitBackend:
+    if backend == "memory":
+        from app.limits.memory import MemoryRateLimit
+
+        return MemoryRateLimit()
+    if backend == "mongo":
+        from app.limits.mongo import MongoRateLimit
+
+        return MongoRateLimit()
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+def get_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: RateLimitBackend | None):
+    global _backend
+    _backend = backend
@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from app.core import configuration
+from app.metrics.registry import Counter, Gauge
+from app.models.result import Result
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests shed before reaching the handlers",
+    ("reason",),
+)
+ADMISSION_WAITING = Gauge("admission_waiting", "Requests queued for an admission slot")
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app,
+        max_concurrency: int = configuration.APP_ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = configuration.APP_ADMISSION_MAX_QUEUE,
+        queue_seconds: float = configuration.APP_ADMISSION_QUEUE_SECONDS,
+        prefix: str = "/api/",
+    ):
+        self.app = app
+        self.max_queue = max_queue
+        self.queue_seconds = queue_seconds
+        self.prefix = prefix
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        if self.semaphore.locked():
+            # a bounded queue, past it requests are shed right away instead
+            # of piling up on Mongo
+            if self.waiting >= self.max_queue:
+                await self.reject(scope, receive, send, "queue_full")
+                return
+            self.waiting += 1
+            ADMISSION_WAITING.inc()
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.queue_seconds)
+            except asyncio.TimeoutError:
+                await self.reject(scope, receive, send, "queue_timeout")
+                return
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAITING.dec()
+        else:
+            await self.semaphore.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.semaphore.release()
+
+    async def reject(self, scope, receive, send, reason: str):
+        ADMISSION_REJECTED.inc((reason,))
+        response = JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=Result(message="Service Unavailable").model_dump(),
+            headers={"Retry-After": str(configuration.APP_ADMISSION_RETRY_AFTER)},
+        )
+        await response(scope, receive, send)
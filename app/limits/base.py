@@ -0,0 +1,9 @@
+from abc import ABC, abstractmethod
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        # token bucket refilled at rate tokens per second up to burst, returns
+        # 0 when the tokens were taken or the seconds to wait otherwise
+        pass
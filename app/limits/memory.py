@@ -0,0 +1,36 @@
+import threading
+import time
+
+from app.limits.base import RateLimitBackend
+
+
+class MemoryRateLimit(RateLimitBackend):
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, last update, time the bucket is full again)
+        self.buckets: dict[str, tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, _ = self.buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            retry_after = 0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / rate
+            self.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+        return retry_after
+
+    def _prune(self, now: float):
+        # a full bucket is the same as a missing one, past the limit the
+        # buckets refilled soonest are dropped
+        buckets = [item for item in self.buckets.items() if item[1][2] > now]
+        if len(buckets) > self.max_keys // 2:
+            buckets.sort(key=lambda item: item[1][2], reverse=True)
+            buckets = buckets[: self.max_keys // 2]
+        self.buckets = dict(buckets)
@@ -0,0 +1,8 @@
+from app.limits.base import RateLimitBackend
+from app.services.rate_limit import RateLimitService
+
+
+class MongoRateLimit(RateLimitBackend):
+    # shared by every worker, costs one round trip per limited request
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        return RateLimitService.take(key, rate, burst, cost)
@@ -0,0 +1,57 @@
+import math
+
+from fastapi import Depends, Request, status
+from fastapi.exceptions import HTTPException
+
+from app.auth.access import get_api_key
+from app.core import configuration
+from app.limits import get_backend
+from app.metrics.registry import Counter
+from app.models.user import UserInDB
+
+RATE_LIMITED = Counter(
+    "rate_limited_total", "Requests rejected by a rate limit", ("limit",)
+)
+
+
+def client_key(request: Request) -> str:
+    # an unvalidated Authorization header is free to vary, only the address
+    # identifies an anonymous client; behind a proxy uvicorn
+    # --forwarded-allow-ips sets it
+    host = request.client.host if request.client is not None else "unknown"
+    return f"ip:{host}"
+
+
+def take(name: str, key: str, rate: float, burst: int):
+    retry_after = get_backend().take(f"{name}:{key}", rate, burst)
+    if retry_after > 0:
+        RATE_LIMITED.inc((name,))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too Many Requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def rate_limit(name: str, per_minute: int, burst: int):
+    rate = per_minute / 60
+
+    # sync so a shared backend round trip runs in the threadpool
+    def dependency(request: Request):
+        if not configuration.APP_RATE_LIMIT_ENABLED or per_minute <= 0:
+            return
+        take(name, client_key(request), rate, burst)
+
+    return dependency
+
+
+def user_rate_limit(name: str, per_minute: int, burst: int):
+    rate = per_minute / 60
+
+    # keyed on the validated api key, an invalid one never reaches the bucket
+    def dependency(user: UserInDB = Depends(get_api_key)):
+        if not configuration.APP_RATE_LIMIT_ENABLED or per_minute <= 0:
+            return
+        take(name, f"user:{user.username}", rate, burst)
+
+    return dependency
@@ -1,32 +1,102 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
+from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from app.core import configuration
-from app.routers import oauth_google, recipe, token, users, page, page_render
+from app.changes import subscribers  # registers the cache invalidations
+from app.changes.listener import ChangeStreamListener
+from app.core import configuration, database
+from app.jobs import handlers  # registers the job handlers
+from app.jobs.worker import JobWorker
+from app.limits.admission import AdmissionMiddleware
+from app.metrics import registry
+from app.metrics.http import MetricsMiddleware
+from app.metrics.profiling import ProfilingMiddleware
+from app.models.result import Result
+from app.routers import (
+    diagnostics,
+    oauth_google,
+    recipe,
+    token,
+    users,
+    page,
+    page_render,
+)
+from app.services.blob import BlobService
+from app.services.change_token import ChangeTokenService
+from app.services.job import JobService
 from app.services.page import PageService
+from app.services.rate_limit import RateLimitService
+from app.services.recipe import RecipeService
+from app.services.recipe_card import RecipeCardService
+from app.services.slow_query import SlowQueryService
+from app.services.token import TokenService
+from app.services.token_public import TokenPublicService
+from app.services.user import UserService
+from app.utils import image_variants
 
 TITLE = configuration.APP_TITLE
 VERSION = configuration.APP_VERSION
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.get_client()
+    RecipeService.create_indexes()
+    RecipeCardService.create_indexes()
+    BlobService.create_indexes()
+    JobService.create_indexes()
+    PageService.create_indexes()
+    TokenService.create_indexes()
+    TokenPublicService.create_indexes()
+    UserService.create_indexes()
+    RateLimitService.create_indexes()
+    SlowQueryService.create_collection()
+    worker = JobWorker()
+    if configuration.APP_JOBS_ENABLED:
+        worker.start()
+    listener = ChangeStreamListener()
+    if configuration.APP_CHANGES_ENABLED:
+        ChangeTokenService.create_indexes()
+        listener.start()
+    yield
+    listener.stop()
+    await worker.stop()
+    image_variants.shutdown_executor()
+    database.close()
+
+
 app = FastAPI(
     title=TITLE,
     version=VERSION,
     openapi_url=None,
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
 )
 
+# added first so it runs inside the session middleware and can check the admin
+if configuration.APP_PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     SessionMiddleware, secret_key=configuration.APP_SECRET_KEY_MIDDLEWARE
 )
+# inside CORS so shed requests still carry the CORS headers
+if configuration.APP_ADMISSION_MAX_CONCURRENCY > 0:
+    app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if configuration.APP_METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/", tags=["Index"])
@@ -38,6 +108,16 @@ def read_root():
         return {"title": TITLE, "version": VERSION}
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    if not configuration.APP_METRICS_ENABLED:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=Result(message="Not Found").model_dump(),
+        )
+    return PlainTextResponse(content=registry.render(), media_type=METRICS_MEDIA_TYPE)
+
+
 @app.get("/api/docs", tags=["Documentation"])  # Tag it as "documentation" for our docs
 async def get_documentation(request: Request):
     response = get_swagger_ui_html(
@@ -61,6 +141,13 @@ async def redoc_html(request: Request):
     return response
 
 
+if configuration.APP_STORAGE_BACKEND == "local":
+    app.mount(
+        configuration.APP_STORAGE_PUBLIC_URL,
+        StaticFiles(directory=configuration.APP_STORAGE_LOCAL_PATH, check_dir=False),
+        name="storage",
+    )
+
 app.include_router(
     oauth_google.router,
     prefix="/api/google",
@@ -72,3 +159,4 @@ app.include_router(token.router, prefix="/api/token", tags=["Token"])
 app.include_router(recipe.router, prefix="/api/recipe", tags=["Recipes"])
 app.include_router(page.router, prefix="/api/pages", tags=["Pages"])
 app.include_router(page_render.router, prefix="/pages", tags=["Pages"])
+app.include_router(diagnostics.router, prefix="/api/diagnostics", tags=["Diagnostics"])
@@ -0,0 +1,35 @@
+from pymongo import monitoring
+
+from app.metrics.registry import Histogram
+
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection and command",
+    ("collection", "command", "outcome"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def __init__(self):
+        self._collections: dict[int, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        self._collections[event.request_id] = (
+            collection if isinstance(collection, str) else ""
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._observe(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._observe(event, "failure")
+
+    def _observe(self, event, outcome: str):
+        collection = self._collections.pop(event.request_id, "")
+        MONGO_COMMAND_DURATION.observe(
+            (collection, event.command_name, outcome), event.duration_micros / 1e6
+        )
@@ -0,0 +1,156 @@
+import functools
+import os
+import time
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool as starlette_run_in_threadpool
+
+from app.core import configuration
+from app.models.user import UserInDB
+from app.services.user import UserService
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+    from pyinstrument.session import Session
+except ImportError:
+    Profiler = None
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "profile"
+FORMATS = {
+    "speedscope": ("application/json", "speedscope.json"),
+    "html": ("text/html; charset=utf-8", "html"),
+}
+# sampling interval and per-thread sessions of the request being profiled
+profiled_request: ContextVar[tuple[float, list] | None] = ContextVar(
+    "profiled_request", default=None
+)
+
+
+def requested_format(scope) -> str | None:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    value = values.get(PROFILE_QUERY, [None])[0]
+    if value is None:
+        for key, header in scope.get("headers", []):
+            if key == PROFILE_HEADER:
+                value = header.decode("latin-1")
+                break
+    if value is None:
+        return None
+    # anything else (profile=0, false, typos) leaves the request unprofiled
+    value = value.strip().lower()
+    if value in FORMATS:
+        return value
+    return None
+
+
+def is_admin(scope) -> bool:
+    # same rules as get_actual_user, without raising for anonymous requests
+    user = (scope.get("session") or {}).get("user")
+    if user is None:
+        return False
+    find = UserService.get_user(UserInDB(username=user["email"], email=user["email"]))
+    return find is not None and find.admin is True and find.disabled is not True
+
+
+async def run_in_threadpool(func, *args, **kwargs):
+    # the request profiler only samples the event loop thread, work offloaded
+    # by a profiled request runs under its own profiler in the worker thread
+    profiled = profiled_request.get()
+    if profiled is None:
+        return await starlette_run_in_threadpool(func, *args, **kwargs)
+    interval, sessions = profiled
+
+    @functools.wraps(func)
+    def call():
+        profiler = Profiler(interval=interval, async_mode="disabled")
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sessions.append(profiler.stop())
+
+    return await starlette_run_in_threadpool(call)
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        interval: float = configuration.APP_PROFILING_INTERVAL,
+        path: str = configuration.APP_PROFILING_PATH,
+    ):
+        self.app = app
+        self.interval = interval
+        self.path = path
+        if Profiler is None:
+            print("pyinstrument is not installed, profiling is disabled")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or Profiler is None:
+            await self.app(scope, receive, send)
+            return
+        fmt = requested_format(scope)
+        if fmt is None or not is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            # the profile replaces the response unless it is stored
+            if self.path != "":
+                await send(message)
+
+        # async mode follows the request task across awaits, the threadpool
+        # calls it makes add their own sessions through run_in_threadpool
+        sessions = []
+        token = profiled_request.set((self.interval, sessions))
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            profiled_request.reset(token)
+        # combining adds up the durations, the request keeps its wall time
+        combined = functools.reduce(Session.combine, sessions, session)
+        combined.duration = session.duration
+
+        media_type, extension = FORMATS[fmt]
+        renderer = SpeedscopeRenderer() if fmt == "speedscope" else HTMLRenderer()
+        output = renderer.render(combined)
+        if self.path != "":
+            self.store(scope, extension, output)
+            return
+        body = output.encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", media_type.encode("latin-1")),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"x-profiled-status", str(status_code).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def store(self, scope, extension: str, output: str):
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        name = route.strip("/").replace("/", "_").replace("{", "").replace("}", "")
+        filename = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{name}.{extension}"
+        )
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, filename), "w") as file:
+                file.write(output)
+        except OSError as e:
+            print(e)
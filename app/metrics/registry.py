@@ -0,0 +1,147 @@
+import math
+import os
+import threading
+from typing import Iterable
+
+# every thread writes to its own shard, shards are only merged when scraped so
+# recording never takes a lock
+_local = threading.local()
+_shards_lock = threading.Lock()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._shards: list[dict] = []
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        shards = getattr(_local, "shards", None)
+        if shards is None:
+            shards = _local.shards = {}
+        shard = shards.get(id(self))
+        if shard is None:
+            shard = shards[id(self)] = {}
+            with _shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _merged(self) -> dict:
+        with _shards_lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            for labels, value in list(shard.items()):
+                merged[labels] = self._merge(merged.get(labels), value)
+        return merged
+
+    def _merge(self, current, value):
+        return value if current is None else current + value
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        return [
+            (self.name, dict(zip(self.labelnames, labels)), value)
+            for labels, value in sorted(self._merged().items())
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), value: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: tuple = (), value: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + value
+
+    def dec(self, labels: tuple = (), value: float = 1):
+        self.inc(labels, -value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = (
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.1,
+            0.25,
+            0.5,
+            1,
+            2.5,
+            5,
+            10,
+        ),
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: tuple, value: float):
+        shard = self._shard()
+        # per bucket counts followed by the +Inf count and the sum
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[len(self.buckets)] += 1
+        counts[-1] += value
+
+    def _merge(self, current, value):
+        if current is None:
+            return list(value)
+        return [a + b for a, b in zip(current, value)]
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        samples = []
+        for labels, counts in sorted(self._merged().items()):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                samples.append((f"{self.name}_bucket", {**base, "le": le}, cumulative))
+            samples.append((f"{self.name}_sum", base, counts[-1]))
+            samples.append((f"{self.name}_count", base, cumulative))
+        return samples
+
+
+REGISTRY: list[Metric] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    # each uvicorn worker keeps its own values, the pid keeps series apart
+    worker = str(os.getpid())
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            labels = {**labels, "worker": worker}
+            text = ",".join(f'{key}="{_escape(item)}"' for key, item in labels.items())
+            lines.append(f"{name}{{{text}}} {value}")
+    return "\n".join(lines) + "\n"
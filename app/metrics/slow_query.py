@@ -0,0 +1,171 @@
+import json
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+
+from pymongo import monitoring
+
+from app.core import configuration
+from app.models.slow_query import SlowQuery
+
+COMMANDS = ("find", "aggregate", "count")
+# keys added by the driver that cannot be sent back inside explain
+DRIVER_KEYS = ("$db", "lsid", "$clusterTime", "$readPreference", "txnNumber")
+REDACTED = "?"
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return REDACTED
+        return [redact(item) for item in value]
+    return REDACTED
+
+
+def redact_plan(plan):
+    if isinstance(plan, dict):
+        return {
+            key: redact(item)
+            if key in ("filter", "indexBounds", "parsedQuery")
+            else redact_plan(item)
+            for key, item in plan.items()
+        }
+    if isinstance(plan, list):
+        return [redact_plan(item) for item in plan]
+    return plan
+
+
+def find_winning_plan(explain):
+    if isinstance(explain, dict):
+        planner = explain.get("queryPlanner")
+        if isinstance(planner, dict) and "winningPlan" in planner:
+            return planner["winningPlan"]
+        items = explain.values()
+    elif isinstance(explain, list):
+        items = explain
+    else:
+        return None
+    for item in items:
+        plan = find_winning_plan(item)
+        if plan is not None:
+            return plan
+    return None
+
+
+def service_origin() -> str | None:
+    # innermost public service method that issued the command, command events
+    # are published on the calling thread so it is still on the stack
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        code = frame.f_code
+        if module.startswith("app.services.") and not code.co_name.startswith("_"):
+            qualname = getattr(code, "co_qualname", None)
+            if qualname is None:
+                owner = frame.f_locals.get("cls")
+                qualname = (
+                    f"{owner.__name__}.{code.co_name}"
+                    if isinstance(owner, type)
+                    else code.co_name
+                )
+            return f"{module}.{qualname}"
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    def __init__(
+        self,
+        threshold_ms: int = configuration.APP_SLOW_QUERY_MS,
+        explain_rate: float = configuration.APP_SLOW_QUERY_EXPLAIN_RATE,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self._pending: dict[int, tuple] = {}
+        # explain and storage happen off the calling thread, records are
+        # dropped instead of blocking when the writer falls behind
+        self._queue: queue.Queue = queue.Queue(maxsize=1000)
+        self._thread: threading.Thread | None = None
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name not in COMMANDS:
+            return
+        self._pending[event.request_id] = (event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event)
+
+    def _finish(self, event):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        database_name, command = pending
+        # only slow commands pay for the stack walk
+        origin = service_origin()
+        try:
+            self._queue.put_nowait(
+                (database_name, event.command_name, command, origin, duration_ms)
+            )
+        except queue.Full:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._write, name="slow-query-log", daemon=True
+            )
+            self._thread.start()
+
+    def _write(self):
+        from app.core.database import get_client
+        from app.services.slow_query import SlowQueryService
+
+        while True:
+            (
+                database_name,
+                command_name,
+                command,
+                origin,
+                duration_ms,
+            ) = self._queue.get()
+            try:
+                if command_name == "find":
+                    shape = command.get("filter", {})
+                elif command_name == "aggregate":
+                    shape = command.get("pipeline", [])
+                else:
+                    shape = command.get("query", {})
+                winning_plan = None
+                if random.random() < self.explain_rate:
+                    explained = {
+                        key: value
+                        for key, value in command.items()
+                        if key not in DRIVER_KEYS
+                    }
+                    explain = get_client()[database_name].command(
+                        "explain", explained, verbosity="queryPlanner"
+                    )
+                    plan = find_winning_plan(explain)
+                    if plan is not None:
+                        winning_plan = json.dumps(redact_plan(plan), default=str)
+                SlowQueryService.insert(
+                    SlowQuery(
+                        collection=str(command.get(command_name, "")),
+                        command=command_name,
+                        duration_ms=duration_ms,
+                        shape=json.dumps(redact(shape), default=str),
+                        origin=origin,
+                        winning_plan=winning_plan,
+                        date_insert=datetime.utcnow(),
+                    )
+                )
+            except Exception as e:
+                print(e)
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from app.core.database import db
+from app.services.recipe_card import CARD_FIELDS, RecipeCardService
+
+BATCH_SIZE = 1000
+
+
+def write(operations: list) -> int:
+    try:
+        db.recipe_cards.bulk_write(operations, ordered=False)
+        return len(operations)
+    except BulkWriteError as e:
+        # a card the application rewrote after start is newer, its upsert
+        # collides on _id and is skipped
+        errors = e.details["writeErrors"]
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        return len(operations) - len(errors)
+
+
+def run() -> tuple[int, int]:
+    RecipeCardService.create_indexes()
+    # cards written by the application while this runs are newer than start
+    start = datetime.utcnow()
+    search = db.recipe.find(
+        {"disabled": False}, {key: 1 for key in CARD_FIELDS}, batch_size=BATCH_SIZE
+    )
+    synced = 0
+    operations = []
+    for find in search:
+        operations.append(
+            ReplaceOne(
+                {"_id": find["_id"], "date_sync": {"$not": {"$gte": start}}},
+                RecipeCardService.card(find),
+                upsert=True,
+            )
+        )
+        if len(operations) >= BATCH_SIZE:
+            synced += write(operations)
+            operations = []
+    if len(operations) > 0:
+        synced += write(operations)
+    # cards of deleted recipes or left behind by a failed write
+    deleted = db.recipe_cards.delete_many(
+        {"date_sync": {"$not": {"$gte": start}}}
+    ).deleted_count
+    return synced, deleted
+
+
+if __name__ == "__main__":
+    synced, deleted = run()
+    print(f"Recipe cards synced: {synced}, deleted: {deleted}")
@@ -0,0 +1,30 @@
+from pymongo import UpdateOne
+
+from app.core.database import db
+from app.services.recipe import RecipeService
+from app.utils.geo import geo_point
+
+BATCH_SIZE = 1000
+
+
+def run() -> int:
+    RecipeService.create_indexes()
+    search = db.recipe.find(
+        {"geo": {"$exists": False}, "lat": {"$ne": None}, "lng": {"$ne": None}},
+        {"_id": 1, "lat": 1, "lng": 1},
+    )
+    updated = 0
+    operations = []
+    for find in search:
+        point = geo_point(find.get("lat"), find.get("lng"))
+        operations.append(UpdateOne({"_id": find["_id"]}, {"$set": {"geo": point}}))
+        if len(operations) >= BATCH_SIZE:
+            updated += db.recipe.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if len(operations) > 0:
+        updated += db.recipe.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    print(f"Recipes updated: {run()}")
@@ -0,0 +1,41 @@
+from pymongo import UpdateOne
+
+from app.core.database import db
+from app.services.recipe import RecipeService
+from app.services.recipe_card import RecipeCardService
+from app.utils.search_keys import search_fields
+
+BATCH_SIZE = 1000
+
+
+def write(operations: list) -> int:
+    updated = db.recipe.bulk_write(operations, ordered=False).modified_count
+    # the cards share the recipe _id and copy the search tokens
+    db.recipe_cards.bulk_write(operations, ordered=False)
+    return updated
+
+
+def run() -> int:
+    RecipeService.create_indexes()
+    RecipeCardService.create_indexes()
+    search = db.recipe.find(
+        {"search_tokens": {"$exists": False}},
+        {"_id": 1, "name": 1, "description": 1, "tags": 1},
+    )
+    updated = 0
+    operations = []
+    for find in search:
+        fields = search_fields(
+            find.get("name"), find.get("description"), find.get("tags")
+        )
+        operations.append(UpdateOne({"_id": find["_id"]}, {"$set": fields}))
+        if len(operations) >= BATCH_SIZE:
+            updated += write(operations)
+            operations = []
+    if len(operations) > 0:
+        updated += write(operations)
+    return updated
+
+
+if __name__ == "__main__":
+    print(f"Recipes updated: {run()}")
@@ -0,0 +1,50 @@
+from app.core.database import db
+from app.services.page import PageService
+from app.services.user import UserService
+
+# non-unique indexes replaced by the unique ones on the same keys
+LEGACY_INDEXES = {"pages": ["slug_disabled"], "user": ["email", "username"]}
+DUPLICATES = [
+    ("pages", {"disabled": False}, "$slug"),
+    ("user", {"email": {"$type": "string"}}, "$email"),
+    ("user", {}, "$username"),
+]
+
+
+def duplicates() -> list[tuple[str, str, int]]:
+    found = []
+    for name, match, key in DUPLICATES:
+        search = db[name].aggregate(
+            [
+                {"$match": match},
+                {"$group": {"_id": key, "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": 1}}},
+            ]
+        )
+        for find in search:
+            found.append((name, find["_id"], find["count"]))
+    return found
+
+
+def run() -> list[tuple[str, str, int]]:
+    found = duplicates()
+    if len(found) > 0:
+        return found
+    for name, indexes in LEGACY_INDEXES.items():
+        existing = db[name].index_information()
+        for index in indexes:
+            if index in existing:
+                db[name].drop_index(index)
+    PageService.create_indexes()
+    UserService.create_indexes()
+    return found
+
+
+if __name__ == "__main__":
+    found = run()
+    for collection, value, count in found:
+        print(f"Duplicated {collection}: {value!r} x{count}")
+    if len(found) > 0:
+        print("Resolve the duplicates and run the migration again")
+    else:
+        print("Unique indexes created")
@@ -0,0 +1,34 @@
+import re
+
+from pymongo import UpdateOne
+
+from app.core.database import db
+
+BATCH_SIZE = 1000
+DISCRIMINATOR = re.compile(r"^(.*)#(\d+)$")
+
+
+def run() -> int:
+    # highest discriminator per base, taken by users created with random ones
+    seeds: dict[str, int] = {}
+    for find in db.user.find({}, {"username": 1}, batch_size=BATCH_SIZE):
+        match = DISCRIMINATOR.match(find.get("username") or "")
+        if match is None:
+            continue
+        base, seq = match.group(1), int(match.group(2))
+        seeds[base] = max(seeds.get(base, 0), seq)
+    # $max never moves a counter back, sign-ups can keep running meanwhile
+    operations = [
+        UpdateOne({"_id": base}, {"$max": {"seq": seq}}, upsert=True)
+        for base, seq in seeds.items()
+    ]
+    for start in range(0, len(operations), BATCH_SIZE):
+        db.username_counters.bulk_write(
+            operations[start : start + BATCH_SIZE], ordered=False
+        )
+    return len(operations)
+
+
+if __name__ == "__main__":
+    seeded = run()
+    print(f"Username counters seeded: {seeded}")
@@ -0,0 +1,11 @@
+from typing import Any, List, Optional
+
+from app.models.base import Base
+
+
+class ChangeEvent(Base):
+    collection: str
+    # insert, update, replace, delete, or reset when events may have been missed
+    operation: str
+    id: Optional[Any] = None
+    updated_fields: List[str] = []
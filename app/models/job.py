@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import Field
+
+from app.models.base import Base
+from app.utils.mongo_validator import PyObjectId
+
+
+class Job(Base):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    name: str
+    payload: dict = {}
+    # same key enqueued twice while pending runs once
+    key: Optional[str] = None
+    status: Literal["pending", "running", "done", "failed"] = "pending"
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: Optional[datetime] = None
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    expire_at: Optional[datetime] = None
+    date_insert: Optional[datetime] = None
+    date_update: Optional[datetime] = None
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Union
 
 from pydantic import BaseModel
 from pydantic.fields import Field
@@ -27,10 +27,19 @@ class Preparation(BaseModel):
     steps: List[Step]
 
 
+class FileVariant(BaseModel):
+    name: str
+    url: str
+    content_type: str
+    width: int
+
+
 class FileBlob(BaseModel):
     name: str
     url: str
     content_type: str
+    # srcset style list, one entry per generated width and format
+    variants: List[FileVariant] = []
 
 
 class Recipe(Base):
@@ -61,6 +70,50 @@ class RecipePublic(Base):
     total: Optional[int] = 0
 
 
+class RecipeNear(Recipe):
+    distance: Optional[float] = None
+
+
+class RecipeNearPublic(Base):
+    content: List[RecipeNear]
+    next_cursor: Optional[str] = None
+
+
+class RecipeCursorPublic(Base):
+    content: List[Recipe]
+    next_cursor: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    value: Union[int, str]
+    count: int
+
+
+class RecipeFacets(Base):
+    tags: List[FacetCount] = []
+    category: List[FacetCount] = []
+    location: List[FacetCount] = []
+    year: List[FacetCount] = []
+
+
+class RecipeBatch(Base):
+    ids: List[PyObjectId]
+
+
+class RecipeBatchPublic(Base):
+    # same order as the requested ids, null where the recipe is not public
+    content: List[Optional[Recipe]]
+    not_found: List[PyObjectId] = []
+
+
+class RecipeSimilar(Recipe):
+    similarity: Optional[float] = None
+
+
+class RecipeSimilarPublic(Base):
+    content: List[RecipeSimilar]
+
+
 class RecipeUserPublic(Base):
     # published = true
     # published = false and reviewed = true  -> revisado y rechazado
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import Field
+
+from app.models.base import Base
+from app.utils.mongo_validator import PyObjectId
+
+
+class SlowQuery(Base):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    collection: str
+    command: str
+    duration_ms: float
+    # JSON filter or pipeline with every value replaced by "?"
+    shape: Optional[str] = None
+    origin: Optional[str] = None
+    # JSON explain() winning plan, only present for sampled operations
+    winning_plan: Optional[str] = None
+    date_insert: Optional[datetime] = None
@@ -0,0 +1,151 @@
+import argparse
+import math
+import time
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import numpy as np
+from scipy import sparse
+
+from app.core import configuration
+from app.core.database import db
+from app.services.recipe_similar import RecipeSimilarService
+from app.utils.search_keys import fold
+
+FEATURE_FIELDS = {
+    "_id": 1,
+    "tags": 1,
+    "category": 1,
+    "location": 1,
+    "preparation.ingredients.name": 1,
+}
+
+
+def features(document: dict) -> list[str]:
+    # prefixed so a tag and an ingredient with the same name stay apart
+    found = [f"tag:{fold(tag)}" for tag in document.get("tags") or []]
+    found += [f"category:{fold(item)}" for item in document.get("category") or []]
+    if document.get("location"):
+        found.append(f"location:{fold(document['location'])}")
+    for preparation in document.get("preparation") or []:
+        for ingredient in preparation.get("ingredients") or []:
+            if ingredient.get("name"):
+                found.append(f"ingredient:{fold(ingredient['name']).strip()}")
+    return found
+
+
+def vectorize(documents: Iterable[dict]) -> tuple[list, sparse.csr_matrix]:
+    # rows are l2 normalized tf-idf vectors, so a dot product is the cosine
+    ids = []
+    vocabulary: dict[str, int] = {}
+    indptr = [0]
+    indices = []
+    for document in documents:
+        columns = [
+            vocabulary.setdefault(name, len(vocabulary)) for name in features(document)
+        ]
+        if len(columns) == 0:
+            continue
+        ids.append(document["_id"])
+        indices.extend(columns)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    matrix = sparse.csr_matrix(
+        (data, np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(ids), len(vocabulary)),
+    )
+    # repeated ingredients add up, then damped
+    matrix.sum_duplicates()
+    matrix.data = 1 + np.log(matrix.data)
+    frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + matrix.shape[0]) / (1 + frequency)) + 1
+    matrix = matrix @ sparse.diags(idf.astype(np.float32))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    matrix = sparse.diags((1 / norms).astype(np.float32)) @ matrix
+    return ids, matrix.tocsr().astype(np.float32)
+
+
+def block_rows(count: int, features: int, block_mb: int) -> int:
+    # per row: the dense block of features and, per cell at the peak, the
+    # float32 similarities, the copy argpartition partitions and its int64
+    # output (the product is freed once copied row-major)
+    return max(1, block_mb * 1024 * 1024 // max(1, features * 4 + count * 16))
+
+
+def top(similarity: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    # the argpartition output is freed on return, only the k columns stay
+    index = np.argpartition(similarity, -k, axis=1)[:, -k:]
+    score = np.take_along_axis(similarity, index, axis=1)
+    order = np.argsort(-score, axis=1)
+    return (
+        np.take_along_axis(index, order, axis=1),
+        np.take_along_axis(score, order, axis=1),
+    )
+
+
+def neighbours(
+    matrix: sparse.csr_matrix, k: int, rows: int
+) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    # yields (first row, neighbour indexes, similarities) for each block,
+    # best first, only recipes sharing at least one feature
+    count = matrix.shape[0]
+    k = min(k, count - 1)
+    if k <= 0:
+        return
+    for start in range(0, count, rows):
+        end = min(start + rows, count)
+        # sparse times a dense block writes the similarities straight into a
+        # dense array, several times faster than a sparse by sparse product
+        block = matrix[start:end].toarray().T
+        similarity = np.ascontiguousarray((matrix @ block).T)
+        similarity[np.arange(end - start), np.arange(start, end)] = -1
+        index, score = top(similarity, k)
+        # released before the next block is allocated
+        del block, similarity
+        yield start, index, score
+
+
+def run(
+    k: int = configuration.APP_SIMILAR_RECIPES_K,
+    block_mb: int = configuration.APP_SIMILAR_RECIPES_BLOCK_MB,
+) -> tuple[int, int]:
+    date_sync = datetime.utcnow()
+    search = db.recipe.find(
+        {"disabled": False, "published": True}, FEATURE_FIELDS, batch_size=5000
+    )
+    ids, matrix = vectorize(search)
+    stored = 0
+    for start, index, score in neighbours(
+        matrix, k, block_rows(*matrix.shape, block_mb)
+    ):
+        items = []
+        for offset in range(index.shape[0]):
+            similar = [
+                {"_id": ids[item], "similarity": round(value, 4)}
+                for item, value in zip(index[offset].tolist(), score[offset].tolist())
+                if value > 0
+            ]
+            items.append({"_id": ids[start + offset], "similar": similar})
+        stored += RecipeSimilarService.replace_many(items, date_sync)
+    deleted = RecipeSimilarService.delete_older(date_sync)
+    return stored, deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute similar recipes")
+    parser.add_argument("--k", type=int, default=configuration.APP_SIMILAR_RECIPES_K)
+    parser.add_argument(
+        "--block-mb", type=int, default=configuration.APP_SIMILAR_RECIPES_BLOCK_MB
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+    stored, deleted = run(args.k, args.block_mb)
+    print(
+        f"Similar recipes stored: {stored}, deleted: {deleted} "
+        f"in {math.ceil(time.perf_counter() - start)}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app.auth.access import get_actual_user
+from app.models.slow_query import SlowQuery
+from app.models.user import UserInDB
+from app.services.slow_query import SlowQueryService
+
+router = APIRouter()
+
+
+@router.get(
+    "/slow-queries", response_model=List[SlowQuery], status_code=status.HTTP_200_OK
+)
+async def get_slow_queries(
+    user: UserInDB = Depends(get_actual_user),
+    collection: Optional[str] = None,
+    n_per_page: int = Query(default=100, gt=0, le=1000),
+):
+    return SlowQueryService.list(collection=collection, n_per_page=n_per_page)
@@ -1,4 +1,3 @@
-from authlib.integrations.starlette_client import OAuth
 from fastapi import APIRouter, Depends, HTTPException, status
 import requests
 from starlette.requests import Request
@@ -14,15 +13,26 @@ from app.utils import validate_forwarded_proto
 
 router = APIRouter()
 
-oauth = OAuth()
 CONF_URL = "https://accounts.google.com/.well-known/openid-configuration"
-oauth.register(
-    name="google",
-    server_metadata_url=CONF_URL,
-    client_kwargs={"scope": "openid email profile"},
-    client_id=configuration.APP_GOOGLE_CLIENT_ID,
-    client_secret=configuration.APP_GOOGLE_CLIENT_SECRET,
-)
+_oauth = None
+
+
+def get_google():
+    # registered on first login so importing the router needs no credentials
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+
+        oauth = OAuth()
+        oauth.register(
+            name="google",
+            server_metadata_url=CONF_URL,
+            client_kwargs={"scope": "openid email profile"},
+            client_id=configuration.APP_GOOGLE_CLIENT_ID,
+            client_secret=configuration.APP_GOOGLE_CLIENT_SECRET,
+        )
+        _oauth = oauth
+    return _oauth.create_client("google")
 
 
 @router.get("/login")
@@ -31,13 +41,13 @@ async def login(request: Request):
     redirect_uri = validate_forwarded_proto.validateHTTPS(
         url=redirect_uri, schema=request.headers.get("x-forwarded-proto")
     )
-    google = oauth.create_client("google")
+    google = get_google()
     return await google.authorize_redirect(request, redirect_uri)
 
 
 @router.get("/auth", response_model=Result)
 async def auth_server_side(request: Request):
-    google = oauth.create_client("google")
+    google = get_google()
     token = await google.authorize_access_token(request)
     user = token.get("userinfo")
     request.session["user"] = dict(user)
@@ -1,43 +1,116 @@
 from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, Request, Response, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
 from fastapi.responses import JSONResponse
 
 from app.auth.access import get_actual_user, get_api_key, get_api_key_public
+from app.limits.rate_limit import rate_limit, user_rate_limit
+from app.metrics.profiling import run_in_threadpool
 from app.models.recipe import (
-    FileBlob,
     Recipe,
+    RecipeBatch,
+    RecipeBatchPublic,
+    RecipeCursorPublic,
+    RecipeFacets,
     RecipeInDB,
+    RecipeNearPublic,
     RecipePublic,
+    RecipeSimilarPublic,
 )
 from app.models.result import Result
 from app.models.token import Token
 from app.models.user import UserInDB
 from app.services.recipe import RecipeService
+from app.services.recipe_facets import RecipeFacetService
+from app.services.recipe_image import RecipeImageService
+from app.services.recipe_similar import RecipeSimilarService
 from app.utils.content_types import CONTENT_TYPES_IMAGE, CONTENT_TYPES_VALID
 from app.utils.exclusion_fields import RESULT_FORMAT
+from app.utils.http_cache import cache_headers, entity_tag, not_modified
 from app.utils.mongo_validator import PyObjectId
-from app.utils import google_cloud_storage
+from app.utils.projection import (
+    InvalidFields,
+    dump_partial,
+    model_keys,
+    parse_fields,
+    partial_model,
+    projection,
+)
+from app.utils.upload_stream import (
+    UploadTooLarge,
+    content_length_allowed,
+    upload_chunks,
+)
 from app.utils.review_state import ReviewState
 
-from app.core.configuration import MAX_SIZE_IMAGE_MB
+from app.core.configuration import (
+    APP_GEO_MAX_DISTANCE_METERS,
+    APP_RATE_LIMIT_SEARCH_BURST,
+    APP_RATE_LIMIT_SEARCH_PER_MINUTE,
+    APP_RATE_LIMIT_SKILL_BURST,
+    APP_RATE_LIMIT_SKILL_PER_MINUTE,
+    APP_RECIPE_BATCH_MAX,
+    MAX_SIZE_IMAGE_MB,
+)
 
 router = APIRouter()
+skill_limit = Depends(
+    user_rate_limit(
+        "skill", APP_RATE_LIMIT_SKILL_PER_MINUTE, APP_RATE_LIMIT_SKILL_BURST
+    )
+)
+search_limit = Depends(
+    rate_limit("search", APP_RATE_LIMIT_SEARCH_PER_MINUTE, APP_RATE_LIMIT_SEARCH_BURST)
+)
 
 
-@router.get("", response_model=List[Recipe], status_code=status.HTTP_200_OK)
+@router.get(
+    "",
+    response_model=List[Recipe],
+    responses={status.HTTP_400_BAD_REQUEST: {"model": Result}},
+    status_code=status.HTTP_200_OK,
+)
 async def get_recipe(
     user: UserInDB = Depends(get_actual_user),
     q: Optional[str] = None,
     page_number: int = 0,
     n_per_page: int = 100,
+    fields: Optional[str] = None,
 ):
+    try:
+        names = parse_fields(fields, model_keys(Recipe))
+    except InvalidFields as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message=str(e)).model_dump(),
+        )
+    exclude_fields = projection(names) if names is not None else {}
+    model = partial_model(Recipe, names) if names is not None else Recipe
     if q is not None:
         search = RecipeService.search(
-            q=q, page_number=page_number, n_per_page=n_per_page
+            q=q,
+            page_number=page_number,
+            n_per_page=n_per_page,
+            exclude_fields=exclude_fields,
+            model=model,
         )
     else:
-        search = RecipeService.list(page_number=page_number, n_per_page=n_per_page)
+        search = RecipeService.list(
+            page_number=page_number,
+            n_per_page=n_per_page,
+            exclude_fields=exclude_fields,
+            model=model,
+        )
+    if names is not None:
+        return JSONResponse(content=dump_partial(search))
     return search
 
 
@@ -85,15 +158,9 @@ async def update_image_recipe(
             content=Result(message="Recipe Not Found").model_dump(),
         )
 
-    result, filename, url, content_type = google_cloud_storage.upload_file(
-        inserted.id, file.filename, file.content_type, file.file
+    inserted = await RecipeImageService.replace(
+        inserted, upload_chunks(file), file.content_type
     )
-    # delete old image if exists after  upload new image
-    if inserted.image is not None and result:
-        deleted = google_cloud_storage.delete_file(inserted.image.name)
-    if result:
-        blob = FileBlob(name=filename, url=url, content_type=content_type)
-        inserted = RecipeService.update_image(inserted.id, blob)
     return inserted
 
 
@@ -183,7 +250,12 @@ async def unpublish_recipe(id: PyObjectId, user: UserInDB = Depends(get_actual_u
     return publish
 
 
-@router.get("/skill", response_model=List[Recipe], status_code=status.HTTP_200_OK)
+@router.get(
+    "/skill",
+    response_model=List[Recipe],
+    status_code=status.HTTP_200_OK,
+    dependencies=[skill_limit],
+)
 async def get_recipe_skill(
     user: UserInDB = Depends(get_api_key),
     q: Optional[str] = None,
@@ -201,32 +273,212 @@ async def get_recipe_skill(
     return search
 
 
-@router.get("/public", response_model=RecipePublic, status_code=status.HTTP_200_OK)
+@router.get(
+    "/public",
+    response_model=RecipePublic,
+    status_code=status.HTTP_200_OK,
+    dependencies=[search_limit],
+)
 async def get_recipe_public(
     search: Optional[str] = None,
     page: int = 0,
     size: int = 10,
+    tags: List[str] = Query(default=[]),
+    category: List[str] = Query(default=[]),
+    location: Optional[str] = None,
+    year: Optional[int] = None,
+    fields: Optional[str] = None,
 ):
+    try:
+        names = parse_fields(fields, RESULT_FORMAT.RECIPE_PUBLIC_SEARCH)
+    except InvalidFields as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message=str(e)).model_dump(),
+        )
+    exclude_fields = RESULT_FORMAT.RECIPE_PUBLIC_SEARCH
+    model = Recipe
+    if names is not None:
+        exclude_fields = projection(names)
+        model = partial_model(Recipe, names)
+    filters = RecipeFacetService.filter_query(
+        tags=tags, category=category, location=location, year=year
+    )
     if search is not None:
-        search_recipes = RecipeService.search_public(
+        search_recipes = await run_in_threadpool(
+            RecipeService.search_public,
             q=search,
             page_number=page,
             n_per_page=size,
             published=True,
-            exclude_fields=RESULT_FORMAT.RECIPE_PUBLIC_SEARCH,
+            exclude_fields=exclude_fields,
+            model=model,
+            filters=filters,
+        )
+        count_recipes = await run_in_threadpool(
+            RecipeService.count_public, q=search, published=True, filters=filters
         )
-        count_recipes = RecipeService.count_public(q=search, published=True)
     else:
-        search_recipes = RecipeService.list_public(
+        search_recipes = await run_in_threadpool(
+            RecipeService.list_public,
             page_number=page,
             n_per_page=size,
             published=True,
-            exclude_fields=RESULT_FORMAT.RECIPE_PUBLIC_SEARCH,
+            exclude_fields=exclude_fields,
+            model=model,
+            filters=filters,
+        )
+        count_recipes = await run_in_threadpool(
+            RecipeService.count_public, published=True, filters=filters
+        )
+    if names is not None:
+        return JSONResponse(
+            content={
+                "content": dump_partial(search_recipes),
+                "total": count_recipes,
+            }
         )
-        count_recipes = RecipeService.count_public(published=True)
     return RecipePublic(content=search_recipes, total=count_recipes)
 
 
+@router.get(
+    "/public/facets",
+    response_model=RecipeFacets,
+    status_code=status.HTTP_200_OK,
+    dependencies=[search_limit],
+)
+async def get_recipe_public_facets(
+    search: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    category: List[str] = Query(default=[]),
+    location: Optional[str] = None,
+    year: Optional[int] = None,
+):
+    filters = RecipeFacetService.filter_query(
+        tags=tags, category=category, location=location, year=year
+    )
+    return RecipeService.facets(q=search or "", filters=filters)
+
+
+@router.get(
+    "/public/near",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Result},
+        status.HTTP_200_OK: {"model": RecipeNearPublic},
+    },
+    dependencies=[search_limit],
+)
+async def get_recipe_public_near(
+    lat: float = Query(ge=-90, le=90),
+    lng: float = Query(ge=-180, le=180),
+    distance: int = Query(default=50000, gt=0, le=APP_GEO_MAX_DISTANCE_METERS),
+    size: int = Query(default=10, gt=0, le=100),
+    cursor: Optional[str] = None,
+):
+    try:
+        search_recipes, next_cursor = RecipeService.near_public(
+            lat=lat,
+            lng=lng,
+            max_distance=distance,
+            n_per_page=size,
+            cursor=cursor,
+            exclude_fields=RESULT_FORMAT.RECIPE_PUBLIC_SEARCH,
+        )
+    except ValueError:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message="Invalid cursor").model_dump(),
+        )
+    return RecipeNearPublic(content=search_recipes, next_cursor=next_cursor)
+
+
+@router.get(
+    "/public/area",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Result},
+        status.HTTP_200_OK: {"model": RecipeCursorPublic},
+    },
+    dependencies=[search_limit],
+)
+async def get_recipe_public_area(
+    min_lat: float = Query(ge=-90, le=90),
+    min_lng: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lng: float = Query(ge=-180, le=180),
+    size: int = Query(default=10, gt=0, le=100),
+    cursor: Optional[str] = None,
+):
+    if min_lat >= max_lat or min_lng >= max_lng:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message="Invalid bounding box").model_dump(),
+        )
+    try:
+        search_recipes, next_cursor = RecipeService.within_public(
+            min_lat=min_lat,
+            min_lng=min_lng,
+            max_lat=max_lat,
+            max_lng=max_lng,
+            n_per_page=size,
+            cursor=cursor,
+            exclude_fields=RESULT_FORMAT.RECIPE_PUBLIC_SEARCH,
+        )
+    except ValueError:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message="Invalid cursor").model_dump(),
+        )
+    return RecipeCursorPublic(content=search_recipes, next_cursor=next_cursor)
+
+
+@router.post(
+    "/public/batch",
+    response_model=RecipeBatchPublic,
+    responses={status.HTTP_400_BAD_REQUEST: {"model": Result}},
+    status_code=status.HTTP_200_OK,
+    dependencies=[search_limit],
+)
+async def get_recipe_public_batch(item: RecipeBatch, fields: Optional[str] = None):
+    if len(item.ids) > APP_RECIPE_BATCH_MAX:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(
+                message=f"Too many ids, maximum allowed: {APP_RECIPE_BATCH_MAX}"
+            ).model_dump(),
+        )
+    try:
+        names = parse_fields(fields, RESULT_FORMAT.RECIPE_PUBLIC_SEARCH)
+    except InvalidFields as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message=str(e)).model_dump(),
+        )
+    exclude_fields = RESULT_FORMAT.RECIPE_PUBLIC_SEARCH
+    model = Recipe
+    if names is not None:
+        exclude_fields = projection(names)
+        model = partial_model(Recipe, names)
+    found = await run_in_threadpool(
+        RecipeService.get_public_many,
+        item.ids,
+        exclude_fields=exclude_fields,
+        model=model,
+    )
+    content = [found.get(id) for id in item.ids]
+    not_found = [id for id in item.ids if id not in found]
+    if names is not None:
+        return JSONResponse(
+            content={
+                "content": [
+                    dump_partial([recipe])[0] if recipe is not None else None
+                    for recipe in content
+                ],
+                "not_found": [str(id) for id in not_found],
+            }
+        )
+    return RecipeBatchPublic(content=content, not_found=not_found)
+
+
 @router.get(
     "/public/{id}",
     responses={
@@ -234,13 +486,20 @@ async def get_recipe_public(
         status.HTTP_200_OK: {"model": Recipe},
     },
 )
-async def get_recipe_id(id: PyObjectId):
-    recipe = RecipeService.get_public(id=id, exclude_fields={"reviewed": 0})
+async def get_recipe_id(id: PyObjectId, request: Request, response: Response):
+    # off the event loop so identical concurrent requests share one query
+    recipe, modified = await run_in_threadpool(
+        RecipeService.get_public_modified, id=id, exclude_fields={"reviewed": 0}
+    )
     if recipe is None:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content=Result(message="Recipe Not Found").model_dump(),
         )
+    headers = cache_headers(entity_tag(id, modified), modified)
+    if not_modified(request.headers, headers["ETag"], modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     return recipe
 
 
@@ -251,16 +510,35 @@ async def get_recipe_id(id: PyObjectId):
         status.HTTP_200_OK: {"model": Recipe},
     },
 )
-async def get_recipe_id_meta(id: PyObjectId):
-    recipe = RecipeService.get_public(id=id, exclude_fields=RESULT_FORMAT.RECIPE_META)
+async def get_recipe_id_meta(id: PyObjectId, request: Request, response: Response):
+    recipe, modified = await run_in_threadpool(
+        RecipeService.get_public_modified,
+        id=id,
+        exclude_fields=RESULT_FORMAT.RECIPE_META,
+    )
     if recipe is None:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content=Result(message="Recipe Not Found").model_dump(),
         )
+    headers = cache_headers(entity_tag(id, modified, "meta"), modified)
+    if not_modified(request.headers, headers["ETag"], modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     return recipe
 
 
+@router.get(
+    "/public/{id}/similar",
+    response_model=RecipeSimilarPublic,
+    status_code=status.HTTP_200_OK,
+)
+async def get_recipe_id_similar(id: PyObjectId):
+    # computed by app.recommendations.similar, empty until its next run
+    content = await run_in_threadpool(RecipeSimilarService.get_public, id)
+    return RecipeSimilarPublic(content=content)
+
+
 # states:
 # published = true -> published
 # published = false and reviewed = true  -> rejected
@@ -274,120 +552,176 @@ async def get_recipe_user(
     state: Literal[
         "published", "rejected", "not_reviewed", "not_requested"
     ] = "not_requested",
+    fields: Optional[str] = None,
     user: Token = Depends(get_api_key_public),
 ):
+    try:
+        names = parse_fields(fields, RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH)
+    except InvalidFields as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=Result(message=str(e)).model_dump(),
+        )
+    exclude_fields = RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH
+    model = Recipe
+    if names is not None:
+        exclude_fields = projection(names)
+        model = partial_model(Recipe, names)
     if search is not None:
         if state == "published":
-            result = RecipeService.search_public(
+            result = await run_in_threadpool(
+                RecipeService.search_public,
                 q=search,
                 page_number=page,
                 n_per_page=size,
                 published=True,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
-                q=search, published=True, publisher=user.username
+            count = await run_in_threadpool(
+                RecipeService.count_public,
+                q=search,
+                published=True,
+                publisher=user.username,
             )
         elif state == "rejected":
-            result = RecipeService.search_public(
+            result = await run_in_threadpool(
+                RecipeService.search_public,
                 q=search,
                 page_number=page,
                 n_per_page=size,
                 published=False,
                 reviewed=ReviewState.REVIEWED,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
+            count = await run_in_threadpool(
+                RecipeService.count_public,
                 q=search,
                 published=False,
                 reviewed=ReviewState.REVIEWED,
                 publisher=user.username,
             )
         elif state == "not_reviewed":
-            result = RecipeService.search_public(
+            result = await run_in_threadpool(
+                RecipeService.search_public,
                 q=search,
                 page_number=page,
                 n_per_page=size,
                 published=False,
                 reviewed=ReviewState.NOT_REVIEWED,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
+            count = await run_in_threadpool(
+                RecipeService.count_public,
                 q=search,
                 published=False,
                 reviewed=ReviewState.NOT_REVIEWED,
                 publisher=user.username,
             )
         elif state == "not_requested":
-            result = RecipeService.search_public(
+            result = await run_in_threadpool(
+                RecipeService.search_public,
                 q=search,
                 page_number=page,
                 n_per_page=size,
                 published=False,
                 reviewed=ReviewState.NOT_REQUESTED,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
+            count = await run_in_threadpool(
+                RecipeService.count_public,
                 q=search,
                 published=False,
                 reviewed=ReviewState.NOT_REQUESTED,
                 publisher=user.username,
             )
+        if names is not None:
+            return JSONResponse(
+                content={
+                    "content": dump_partial(result),
+                    "total": count,
+                }
+            )
         return RecipePublic(content=result, total=count)
     else:
         if state == "published":
-            result = RecipeService.list_public(
+            result = await run_in_threadpool(
+                RecipeService.list_public,
                 page_number=page,
                 n_per_page=size,
                 published=True,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
+            )
+            count = await run_in_threadpool(
+                RecipeService.count_public, published=True, publisher=user.username
             )
-            count = RecipeService.count_public(published=True, publisher=user.username)
         elif state == "rejected":
-            result = RecipeService.list_public(
+            result = await run_in_threadpool(
+                RecipeService.list_public,
                 page_number=page,
                 n_per_page=size,
                 published=False,
                 reviewed=ReviewState.REVIEWED,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
-                published=False, reviewed=ReviewState.REVIEWED, publisher=user.username
+            count = await run_in_threadpool(
+                RecipeService.count_public,
+                published=False,
+                reviewed=ReviewState.REVIEWED,
+                publisher=user.username,
             )
         elif state == "not_reviewed":
-            result = RecipeService.list_public(
+            result = await run_in_threadpool(
+                RecipeService.list_public,
                 page_number=page,
                 n_per_page=size,
                 published=False,
                 reviewed=ReviewState.NOT_REVIEWED,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
+            count = await run_in_threadpool(
+                RecipeService.count_public,
                 published=False,
                 reviewed=ReviewState.NOT_REVIEWED,
                 publisher=user.username,
             )
         elif state == "not_requested":
-            result = RecipeService.list_public(
+            result = await run_in_threadpool(
+                RecipeService.list_public,
                 page_number=page,
                 n_per_page=size,
                 published=False,
                 reviewed=ReviewState.NOT_REQUESTED,
                 publisher=user.username,
-                exclude_fields=RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH,
+                exclude_fields=exclude_fields,
+                model=model,
             )
-            count = RecipeService.count_public(
+            count = await run_in_threadpool(
+                RecipeService.count_public,
                 published=False,
                 reviewed=ReviewState.NOT_REQUESTED,
                 publisher=user.username,
             )
+        if names is not None:
+            return JSONResponse(
+                content={
+                    "content": dump_partial(result),
+                    "total": count,
+                }
+            )
         return RecipePublic(content=result, total=count)
 
 
@@ -560,15 +894,70 @@ async def update_image_recipe_user(
                 message=f"Formato no válido, únicos formatos permitidos: {','.join(CONTENT_TYPES_VALID)}"
             ).model_dump(),
         )
+    if not content_length_allowed(request.headers, MAX_SIZE_IMAGE_MB * 1024 * 1024):
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content=Result(
+                message=f"Tamaño de imagen no válido, máximo permitido: {MAX_SIZE_IMAGE_MB} MB"
+            ).model_dump(),
+        )
+    find = RecipeService.get_id_and_user(id=id, publisher=user.username)
+    if find is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=Result(message="Receta no encontrada").model_dump(),
+        )
+    if find.published is True:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content=Result(
+                message="La receta ya se encuentra publicada, no se puede cambiar la imagen"
+            ).model_dump(),
+        )
     try:
-        size_image = request.headers.get("content-length")
-        size_image = int(size_image)
-    except:
+        find = await RecipeImageService.replace(
+            find,
+            upload_chunks(file),
+            file.content_type,
+            max_bytes=MAX_SIZE_IMAGE_MB * 1024 * 1024,
+        )
+    except UploadTooLarge:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content=Result(
+                message=f"Tamaño de imagen no válido, máximo permitido: {MAX_SIZE_IMAGE_MB} MB"
+            ).model_dump(),
+        )
+    return find
+
+
+# streaming variant of the upload above, the raw image is sent as the request
+# body with its Content-Type so nothing is spooled before the limit is checked
+@router.put(
+    "/user/public/{id}/image",
+    response_model=Recipe,
+    responses={
+        status.HTTP_200_OK: {"model": Recipe},
+        status.HTTP_404_NOT_FOUND: {"model": Result},
+        status.HTTP_400_BAD_REQUEST: {"model": Result},
+        status.HTTP_409_CONFLICT: {"model": Result},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"model": Result},
+    },
+)
+async def stream_image_recipe_user(
+    request: Request,
+    id: PyObjectId,
+    user: Token = Depends(get_api_key_public),
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if not content_type in CONTENT_TYPES_IMAGE:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content=Result(message="Tamaño de imagen no válido").model_dump(),
+            content=Result(
+                message=f"Formato no válido, únicos formatos permitidos: {','.join(CONTENT_TYPES_VALID)}"
+            ).model_dump(),
         )
-    if size_image > MAX_SIZE_IMAGE_MB * 1024 * 1024:
+    if not content_length_allowed(request.headers, MAX_SIZE_IMAGE_MB * 1024 * 1024):
         return JSONResponse(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             content=Result(
@@ -588,15 +977,20 @@ async def update_image_recipe_user(
                 message="La receta ya se encuentra publicada, no se puede cambiar la imagen"
             ).model_dump(),
         )
-    result, filename, url, content_type = google_cloud_storage.upload_file(
-        find.id, file.filename, file.content_type, file.file
-    )
-    # delete old image if exists after  upload new image
-    if find.image is not None and result:
-        deleted = google_cloud_storage.delete_file(find.image.name)
-    if result:
-        blob = FileBlob(name=filename, url=url, content_type=content_type)
-        find = RecipeService.update_image(find.id, blob)
+    try:
+        find = await RecipeImageService.replace(
+            find,
+            request.stream(),
+            content_type,
+            max_bytes=MAX_SIZE_IMAGE_MB * 1024 * 1024,
+        )
+    except UploadTooLarge:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content=Result(
+                message=f"Tamaño de imagen no válido, máximo permitido: {MAX_SIZE_IMAGE_MB} MB"
+            ).model_dump(),
+        )
     return find
 
 
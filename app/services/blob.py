@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import List
+
+from pymongo import ASCENDING
+from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.database import db
+from app.models.recipe import FileBlob, FileVariant
+
+
+class BlobService:
+    TABLE = db.blob
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index([("name", ASCENDING)], unique=True, name="name")
+
+    @classmethod
+    def acquire(cls, digest: str) -> FileBlob | None:
+        ret = cls.TABLE.find_one_and_update(
+            {"_id": digest},
+            {"$inc": {"refs": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if ret is not None:
+            return FileBlob(**ret)
+        else:
+            return None
+
+    @classmethod
+    def get_by_name(cls, name: str) -> FileBlob | None:
+        ret = cls.TABLE.find_one({"name": name})
+        if ret is not None:
+            return FileBlob(**ret)
+        else:
+            return None
+
+    @classmethod
+    def insert(cls, digest: str, blob: FileBlob) -> FileBlob:
+        while True:
+            try:
+                cls.TABLE.insert_one(
+                    {
+                        "_id": digest,
+                        **blob.model_dump(),
+                        "refs": 1,
+                        "date_insert": datetime.utcnow(),
+                    }
+                )
+                return blob
+            except DuplicateKeyError:
+                # the same content was stored concurrently, share that copy
+                # unless it was released in between
+                ret = cls.acquire(digest)
+                if ret is not None:
+                    return ret
+
+    @classmethod
+    def release(cls, name: str) -> bool:
+        ret = cls.TABLE.find_one_and_update(
+            {"name": name},
+            {"$inc": {"refs": -1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if ret is None:
+            # stored before deduplication, the file belongs to a single recipe
+            return True
+        if ret["refs"] > 0:
+            return False
+        deleted = cls.TABLE.delete_one({"_id": ret["_id"], "refs": {"$lte": 0}})
+        return deleted.deleted_count > 0
+
+    @classmethod
+    def update_variants(cls, name: str, variants: List[FileVariant]) -> bool:
+        ret = cls.TABLE.update_one(
+            {"name": name},
+            {"$set": {"variants": [item.model_dump() for item in variants]}},
+        )
+        return ret.matched_count > 0
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from pymongo import ASCENDING
+
+from app.core.database import db
+
+# live listeners save at least every APP_CHANGES_SAVE_SECONDS, tokens of
+# workers that went away are dropped after a day
+EXPIRE_SECONDS = 86400
+
+
+class ChangeTokenService:
+    TABLE = db.change_stream_tokens
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index(
+            [("date_update", ASCENDING)],
+            name="date_update",
+            expireAfterSeconds=EXPIRE_SECONDS,
+        )
+
+    @classmethod
+    def get(cls, name: str) -> dict | None:
+        find = cls.TABLE.find_one({"_id": name})
+        if find is not None:
+            return find["token"]
+        else:
+            return None
+
+    @classmethod
+    def save(cls, name: str, token: dict):
+        cls.TABLE.update_one(
+            {"_id": name},
+            {"$set": {"token": token, "date_update": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    @classmethod
+    def delete(cls, name: str):
+        cls.TABLE.delete_one({"_id": name})
@@ -0,0 +1,158 @@
+import random
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING
+from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core import configuration
+from app.core.database import db
+from app.models.job import Job
+
+BACKOFF_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+
+
+class JobService:
+    TABLE = db.jobs
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index(
+            [("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"
+        )
+        cls.TABLE.create_index(
+            [("key", ASCENDING)],
+            unique=True,
+            # the key is removed once the job finishes so it can be queued again
+            partialFilterExpression={"key": {"$exists": True}},
+            name="key_active",
+        )
+        cls.TABLE.create_index(
+            [("expire_at", ASCENDING)], expireAfterSeconds=0, name="expire_at"
+        )
+
+    @classmethod
+    def enqueue(
+        cls,
+        name: str,
+        payload: dict = {},
+        key: str | None = None,
+        delay_seconds: int = 0,
+        max_attempts: int = configuration.APP_JOBS_MAX_ATTEMPTS,
+    ) -> bool:
+        now = datetime.utcnow()
+        item = Job(
+            name=name,
+            payload=payload,
+            key=key,
+            max_attempts=max_attempts,
+            run_at=now + timedelta(seconds=delay_seconds),
+            date_insert=now,
+        )
+        if hasattr(item, "id"):
+            delattr(item, "id")
+        document = item.model_dump(by_alias=True)
+        if key is None:
+            del document["key"]
+        try:
+            cls.TABLE.insert_one(document)
+            return True
+        except DuplicateKeyError:
+            # the same work is already queued
+            return False
+
+    @classmethod
+    def claim(
+        cls, lease_seconds: int = configuration.APP_JOBS_LEASE_SECONDS
+    ) -> Job | None:
+        now = datetime.utcnow()
+        # a job whose every attempt died with its worker (e.g. it crashes the
+        # process) is not retried again
+        cls.TABLE.update_many(
+            {
+                "status": "running",
+                "locked_until": {"$lte": now},
+                "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+            },
+            {
+                "$set": {
+                    "status": "failed",
+                    "last_error": "Lease expired",
+                    "date_update": now,
+                    "expire_at": now
+                    + timedelta(hours=configuration.APP_JOBS_RETENTION_HOURS),
+                },
+                "$unset": {"locked_until": "", "key": ""},
+            },
+        )
+        ret = cls.TABLE.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "run_at": {"$lte": now}},
+                    # a worker died holding the job, its lease expired
+                    {
+                        "status": "running",
+                        "locked_until": {"$lte": now},
+                        "$expr": {"$lt": ["$attempts", "$max_attempts"]},
+                    },
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_until": now + timedelta(seconds=lease_seconds),
+                    "date_update": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if ret is not None:
+            return Job(**ret)
+        else:
+            return None
+
+    @classmethod
+    def complete(cls, job: Job):
+        now = datetime.utcnow()
+        cls.TABLE.update_one(
+            {"_id": job.id, "status": "running"},
+            {
+                "$set": {
+                    "status": "done",
+                    "date_update": now,
+                    "expire_at": now
+                    + timedelta(hours=configuration.APP_JOBS_RETENTION_HOURS),
+                },
+                "$unset": {"locked_until": "", "key": ""},
+            },
+        )
+
+    @classmethod
+    def fail(cls, job: Job, error: str):
+        now = datetime.utcnow()
+        unset = {"locked_until": ""}
+        if job.attempts >= job.max_attempts:
+            unset["key"] = ""
+            update = {
+                "status": "failed",
+                "last_error": error,
+                "date_update": now,
+                "expire_at": now
+                + timedelta(hours=configuration.APP_JOBS_RETENTION_HOURS),
+            }
+        else:
+            delay = min(BACKOFF_SECONDS * 2 ** (job.attempts - 1), BACKOFF_MAX_SECONDS)
+            delay = delay * random.uniform(0.5, 1.5)
+            update = {
+                "status": "pending",
+                "last_error": error,
+                "run_at": now + timedelta(seconds=delay),
+                "date_update": now,
+            }
+        cls.TABLE.update_one(
+            {"_id": job.id, "status": "running"},
+            {"$set": update, "$unset": unset},
+        )
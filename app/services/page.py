@@ -1,15 +1,29 @@
 from datetime import datetime
 from typing import List
 
+from pymongo import ASCENDING
 from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from app.core.database import db
+from app.core.database import create_unique_index, db
 from app.models.page import Page, PageInDB
 from app.utils.mongo_validator import PyObjectId
 
 
 class PageService:
     TABLE = db.pages
+    PUBLIC_TABLE = db.public("pages")
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index([("disabled", ASCENDING)], name="disabled")
+        # a slug is unique among active pages, deleted pages free it
+        create_unique_index(
+            cls.TABLE,
+            [("slug", ASCENDING)],
+            "slug_active",
+            partialFilterExpression={"disabled": False},
+        )
 
     @classmethod
     def insert(cls, item: PageInDB) -> Page | None:
@@ -22,13 +36,12 @@ class PageService:
         if hasattr(item, "username_update"):
             delattr(item, "username_update")
 
-        ret = cls.get_by_slug(item.slug)
-        if ret is None:
-            inserted = cls.TABLE.insert_one(item.model_dump(by_alias=True))
-            ret = cls.get(PyObjectId(inserted.inserted_id))
-            return ret
-        else:
+        document = item.model_dump(by_alias=True)
+        try:
+            cls.TABLE.insert_one(document)
+        except DuplicateKeyError:
             return None
+        return Page(**document)
 
     @classmethod
     def update(cls, item: PageInDB) -> Page | None:
@@ -39,17 +52,16 @@ class PageService:
         if hasattr(item, "disabled"):
             delattr(item, "disabled")
         item.date_update = datetime.utcnow()
-        ret = cls.get_by_slug(item.slug)
-        if ret is None or item.id == ret.id:
+        try:
             ret = cls.TABLE.find_one_and_update(
                 {"_id": item.id, "disabled": False},
                 {"$set": item.model_dump(by_alias=True)},
                 return_document=ReturnDocument.AFTER,
             )
-            if ret is not None:
-                return Page(**ret)
-            else:
-                return None
+        except DuplicateKeyError:
+            return None
+        if ret is not None:
+            return Page(**ret)
         else:
             return None
 
@@ -123,7 +135,7 @@ class PageService:
 
     @classmethod
     def get_by_slug(cls, slug: str) -> Page | None:
-        search = cls.TABLE.find_one({"slug": slug, "disabled": False})
+        search = cls.PUBLIC_TABLE.find_one({"slug": slug, "disabled": False})
         if search is not None:
             return Page(**search)
         else:
@@ -0,0 +1,61 @@
+from pymongo import ASCENDING
+from pymongo.collection import ReturnDocument
+
+from app.core.database import db
+
+
+class RateLimitService:
+    TABLE = db.rate_limits
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index(
+            [("expire_at", ASCENDING)], name="expire_at", expireAfterSeconds=0
+        )
+
+    @classmethod
+    def take(cls, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        # refilled and taken in one pipeline update with the server clock, so
+        # concurrent workers never read and write the bucket separately
+        elapsed = {
+            "$divide": [
+                {"$subtract": ["$$NOW", {"$ifNull": ["$date_update", "$$NOW"]}]},
+                1000,
+            ]
+        }
+        tokens = {
+            "$min": [
+                burst,
+                {
+                    "$add": [
+                        {"$ifNull": ["$tokens", burst]},
+                        {"$multiply": [elapsed, rate]},
+                    ]
+                },
+            ]
+        }
+        ret = cls.TABLE.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": tokens, "date_update": "$$NOW"}},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {
+                    "$set": {
+                        "tokens": {
+                            "$cond": [
+                                "$allowed",
+                                {"$subtract": ["$tokens", cost]},
+                                "$tokens",
+                            ]
+                        },
+                        # a full bucket is the same as a missing one
+                        "expire_at": {"$add": ["$$NOW", burst / rate * 1000]},
+                    }
+                },
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if ret["allowed"]:
+            return 0
+        return (cost - ret["tokens"]) / rate
@@ -1,16 +1,92 @@
 from datetime import datetime
 from typing import List
 
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo import ASCENDING, GEOSPHERE
 from pymongo.collection import ReturnDocument
 
 from app.core.database import db
-from app.models.recipe import FileBlob, Recipe, RecipeInDB
+from app.models.recipe import (
+    FileBlob,
+    FileVariant,
+    Recipe,
+    RecipeFacets,
+    RecipeInDB,
+    RecipeNear,
+)
+from app.services.recipe_card import RecipeCardService
+from app.services.recipe_facets import RecipeFacetService
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.geo import geo_box, geo_point
 from app.utils.mongo_validator import PyObjectId
 from app.utils.review_state import ReviewState
+from app.utils.search_keys import search_fields, search_query
+from app.utils.single_flight import single_flight
 
 
 class RecipeService:
     TABLE = db.recipe
+    PUBLIC_TABLE = db.public("recipe")
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index(
+            [("geo", GEOSPHERE), ("published", ASCENDING), ("disabled", ASCENDING)],
+            name="geo_published",
+        )
+        cls.TABLE.create_index(
+            [("disabled", ASCENDING), ("published", ASCENDING)],
+            name="disabled_published",
+        )
+        cls.TABLE.create_index(
+            [
+                ("publisher", ASCENDING),
+                ("disabled", ASCENDING),
+                ("published", ASCENDING),
+                ("reviewed", ASCENDING),
+            ],
+            name="publisher_state",
+        )
+        cls.TABLE.create_index([("image.name", ASCENDING)], name="image_name")
+        cls.TABLE.create_index(
+            [("search_tokens", ASCENDING), ("published", ASCENDING)],
+            name="search_tokens",
+        )
+        cls.TABLE.create_index(
+            [("search_name", ASCENDING), ("published", ASCENDING)],
+            name="search_name",
+        )
+
+    @classmethod
+    def _reader(cls, publisher: str = ""):
+        # publishers listing their own recipes must see their last write
+        if publisher != "":
+            return cls.TABLE
+        return cls.PUBLIC_TABLE
+
+    @classmethod
+    def _list_reader(cls, publisher: str = "", exclude_fields: dict = {}):
+        # list views that only need card fields read the compact cards
+        if RecipeCardService.covers(exclude_fields):
+            return RecipeCardService.reader(publisher)
+        return cls._reader(publisher)
+
+    @classmethod
+    def _find_one_and_update(cls, filter: dict, update: dict) -> dict | None:
+        # every write bumps the revision the card sync is ordered by
+        update = {**update, "$inc": {**update.get("$inc", {}), "revision": 1}}
+        after = cls.TABLE.find_one_and_update(
+            filter, update, return_document=ReturnDocument.AFTER
+        )
+        if after is None:
+            return None
+        # the card the sync replaced tells listeners which state transition
+        # happened; a sync overtaken by a newer revision has nothing to report
+        synced, before = RecipeCardService.sync(after)
+        if synced:
+            RecipeFacetService.on_change(before, after)
+        return after
 
     @classmethod
     def insert(cls, item: RecipeInDB) -> Recipe | None:
@@ -22,7 +98,14 @@ class RecipeService:
             delattr(item, "id")
         if hasattr(item, "username_update"):
             delattr(item, "username_update")
-        inserted = cls.TABLE.insert_one(item.model_dump(by_alias=True))
+        document = item.model_dump(by_alias=True)
+        document["geo"] = geo_point(item.lat, item.lng)
+        document.update(search_fields(item.name, item.description, item.tags))
+        document["revision"] = 0
+        inserted = cls.TABLE.insert_one(document)
+        synced, before = RecipeCardService.sync(document)
+        if synced:
+            RecipeFacetService.on_change(before, document)
         ret = cls.get(PyObjectId(inserted.inserted_id))
         return ret
 
@@ -35,10 +118,12 @@ class RecipeService:
         if hasattr(item, "disabled"):
             delattr(item, "disabled")
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        document = item.model_dump(by_alias=True)
+        document["geo"] = geo_point(item.lat, item.lng)
+        document.update(search_fields(item.name, item.description, item.tags))
+        ret = cls._find_one_and_update(
             {"_id": item.id, "disabled": False},
-            {"$set": item.model_dump(by_alias=True)},
-            return_document=ReturnDocument.AFTER,
+            {"$set": document},
         )
         if ret is not None:
             return Recipe(**ret)
@@ -48,7 +133,7 @@ class RecipeService:
     @classmethod
     def delete(cls, item: RecipeInDB) -> Recipe | None:
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        ret = cls._find_one_and_update(
             {"_id": item.id, "disabled": False},
             {
                 "$set": {
@@ -57,7 +142,6 @@ class RecipeService:
                     "username_update": item.username_update,
                 }
             },
-            return_document=ReturnDocument.AFTER,
         )
         if ret is not None:
             return Recipe(**ret)
@@ -67,7 +151,7 @@ class RecipeService:
     @classmethod
     def delete_id_and_user(cls, item: RecipeInDB) -> Recipe | None:
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        ret = cls._find_one_and_update(
             {"_id": item.id, "publisher": item.publisher, "disabled": False},
             {
                 "$set": {
@@ -76,7 +160,6 @@ class RecipeService:
                     "username_update": item.username_update,
                 }
             },
-            return_document=ReturnDocument.AFTER,
         )
         if ret is not None:
             return Recipe(**ret)
@@ -86,7 +169,7 @@ class RecipeService:
     @classmethod
     def publish(cls, item: RecipeInDB, published: bool) -> Recipe | None:
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        ret = cls._find_one_and_update(
             {"_id": item.id, "disabled": False},
             {
                 "$set": {
@@ -95,7 +178,6 @@ class RecipeService:
                     "username_update": item.username_update,
                 }
             },
-            return_document=ReturnDocument.AFTER,
         )
         if ret is not None:
             return Recipe(**ret)
@@ -121,27 +203,69 @@ class RecipeService:
             return None
 
     @classmethod
+    @single_flight("recipe.get_public")
     def get_public(cls, id: PyObjectId, exclude_fields: dict = {}) -> Recipe | None:
         query = {"_id": id, "disabled": False, "published": True}
-        search = cls.TABLE.find_one(query, exclude_fields)
+        search = cls.PUBLIC_TABLE.find_one(query, exclude_fields)
         if search is not None:
             return Recipe(**search)
         else:
             return None
 
     @classmethod
-    def list(cls, page_number: int = 0, n_per_page: int = 100) -> List[Recipe]:
+    @single_flight("recipe.get_public_many")
+    def get_public_many(
+        cls,
+        ids: List[PyObjectId],
+        exclude_fields: dict = {},
+        model: type[BaseModel] = Recipe,
+    ) -> dict[ObjectId, Recipe]:
+        query = {"_id": {"$in": list(set(ids))}, "disabled": False, "published": True}
+        items = {}
+        for find in cls.PUBLIC_TABLE.find(query, exclude_fields):
+            items[find["_id"]] = model(**find)
+        return items
+
+    @classmethod
+    @single_flight("recipe.get_public_modified")
+    def get_public_modified(
+        cls, id: PyObjectId, exclude_fields: dict = {}
+    ) -> tuple[Recipe | None, datetime | None]:
+        # the modification date drives ETag and Last-Modified of the detail views
+        projection = exclude_fields
+        if projection and all(value for value in projection.values()):
+            projection = {**projection, "date_insert": 1, "date_update": 1}
+        query = {"_id": id, "disabled": False, "published": True}
+        search = cls.PUBLIC_TABLE.find_one(query, projection)
+        if search is None:
+            return None, None
+        modified = (
+            search.get("date_update")
+            or search.get("date_insert")
+            or search["_id"].generation_time.replace(tzinfo=None)
+        )
+        return Recipe(**search), modified
+
+    @classmethod
+    def list(
+        cls,
+        page_number: int = 0,
+        n_per_page: int = 100,
+        exclude_fields: dict = {},
+        model: type[BaseModel] = Recipe,
+    ) -> List[Recipe]:
         search = (
-            cls.TABLE.find({"disabled": False})
+            cls.TABLE.find({"disabled": False}, exclude_fields)
             .skip(((page_number - 1) * n_per_page) if page_number > 0 else 0)
             .limit(n_per_page)
         )
         items = []
         for find in search:
-            items.append(Recipe(**find))
+            items.append(model(**find))
         return items
 
     @classmethod
+    @single_flight("recipe.list_public")
     def list_public(
         cls,
         page_number: int = 0,
@@ -150,8 +274,10 @@ class RecipeService:
         publisher: str = "",
         reviewed: ReviewState = ReviewState.IGNORE,
         exclude_fields: dict = {},
+        filters: dict = {},
+        model: type[BaseModel] = Recipe,
     ) -> List[Recipe]:
-        query = {"disabled": False, "published": published}
+        query = {"disabled": False, "published": published, **filters}
         if publisher != "":
             query["publisher"] = publisher
         if ReviewState.NOT_REVIEWED == reviewed:
@@ -163,47 +289,45 @@ class RecipeService:
         if ReviewState.IGNORE == reviewed:
             pass
         search = (
-            cls.TABLE.find(query, exclude_fields)
+            cls._list_reader(publisher, exclude_fields)
+            .find(query, exclude_fields)
             .skip(((page_number - 1) * n_per_page) if page_number > 0 else 0)
             .limit(n_per_page)
         )
         items = []
         for find in search:
-            items.append(Recipe(**find))
+            items.append(model(**find))
         return items
 
     @classmethod
     def search(
-        cls, q: str, page_number: int = 0, n_per_page: int = 100
+        cls,
+        q: str,
+        page_number: int = 0,
+        n_per_page: int = 100,
+        exclude_fields: dict = {},
+        model: type[BaseModel] = Recipe,
     ) -> List[Recipe]:
         search = (
             cls.TABLE.find(
                 {
                     "$and": [
                         {"disabled": False},
-                        {
-                            "$or": [
-                                {
-                                    "description": {
-                                        "$regex": q,
-                                        "$options": "i",
-                                    }
-                                },
-                                {"name": {"$regex": q, "$options": "i"}},
-                            ]
-                        },
+                        search_query(q),
                     ]
-                }
+                },
+                exclude_fields,
             )
             .skip(((page_number - 1) * n_per_page) if page_number > 0 else 0)
             .limit(n_per_page)
         )
         items = []
         for find in search:
-            items.append(Recipe(**find))
+            items.append(model(**find))
         return items
 
     @classmethod
+    @single_flight("recipe.search_public")
     def search_public(
         cls,
         q: str,
@@ -213,22 +337,15 @@ class RecipeService:
         publisher: str = "",
         reviewed: ReviewState = ReviewState.IGNORE,
         exclude_fields: dict = {},
+        filters: dict = {},
+        model: type[BaseModel] = Recipe,
     ) -> List[Recipe]:
         query = {
             "$and": [
                 {"disabled": False},
                 {"published": published},
-                {
-                    "$or": [
-                        {
-                            "description": {
-                                "$regex": q,
-                                "$options": "i",
-                            }
-                        },
-                        {"name": {"$regex": q, "$options": "i"}},
-                    ]
-                },
+                filters,
+                search_query(q),
             ]
         }
         if publisher != "":
@@ -242,13 +359,14 @@ class RecipeService:
         if ReviewState.IGNORE == reviewed:
             pass
         search = (
-            cls.TABLE.find(query, exclude_fields)
+            cls._list_reader(publisher, exclude_fields)
+            .find(query, exclude_fields)
             .skip(((page_number - 1) * n_per_page) if page_number > 0 else 0)
             .limit(n_per_page)
         )
         items = []
         for find in search:
-            items.append(Recipe(**find))
+            items.append(model(**find))
         return items
 
     @classmethod
@@ -260,32 +378,24 @@ class RecipeService:
                 {
                     "$and": [
                         {"disabled": False},
-                        {
-                            "$or": [
-                                {
-                                    "description": {
-                                        "$regex": q,
-                                        "$options": "i",
-                                    }
-                                },
-                                {"name": {"$regex": q, "$options": "i"}},
-                            ]
-                        },
+                        search_query(q),
                     ]
                 }
             )
         return count
 
     @classmethod
+    @single_flight("recipe.count_public")
     def count_public(
         cls,
         q: str = "",
         published: bool = True,
         publisher: str = "",
         reviewed: ReviewState = ReviewState.IGNORE,
+        filters: dict = {},
     ) -> int:
         if q == "":
-            query = {"disabled": False, "published": published}
+            query = {"disabled": False, "published": published, **filters}
             if publisher != "":
                 query["publisher"] = publisher
             if ReviewState.NOT_REVIEWED == reviewed:
@@ -296,23 +406,14 @@ class RecipeService:
                 query["reviewed"] = None
             if ReviewState.IGNORE == reviewed:
                 pass
-            count = cls.TABLE.count_documents(query)
+            count = RecipeCardService.reader(publisher).count_documents(query)
         else:
             query = {
                 "$and": [
                     {"disabled": False},
                     {"published": published},
-                    {
-                        "$or": [
-                            {
-                                "description": {
-                                    "$regex": q,
-                                    "$options": "i",
-                                }
-                            },
-                            {"name": {"$regex": q, "$options": "i"}},
-                        ]
-                    },
+                    filters,
+                    search_query(q),
                 ]
             }
             if publisher != "":
@@ -325,20 +426,29 @@ class RecipeService:
                 query["$and"].append({"reviewed": None})
             if ReviewState.IGNORE == reviewed:
                 pass
-            count = cls.TABLE.count_documents(query)
+            count = RecipeCardService.reader(publisher).count_documents(query)
         return count
 
+    @classmethod
+    def facets(cls, q: str = "", filters: dict = {}) -> RecipeFacets:
+        if q == "" and not filters:
+            return RecipeFacetService.snapshot()
+        query = {"$and": [{"disabled": False}, {"published": True}, filters]}
+        if q != "":
+            query["$and"].append(search_query(q))
+        return RecipeFacetService.search(query)
+
     @classmethod
     def search_by_name(
         cls, q: str, page_number: int = 0, n_per_page: int = 100, published: bool = True
     ) -> List[Recipe]:
         search = (
-            cls.TABLE.find(
+            cls.PUBLIC_TABLE.find(
                 {
                     "$and": [
                         {"disabled": False},
                         {"published": published},
-                        {"name": {"$regex": q, "$options": "i"}},
+                        search_query(q, "search_name"),
                     ]
                 }
             )
@@ -354,7 +464,7 @@ class RecipeService:
     def list_random(
         cls, page_number: int = 0, n_per_page: int = 100, published: bool = True
     ) -> List[Recipe]:
-        search = cls.TABLE.aggregate(
+        search = cls.PUBLIC_TABLE.aggregate(
             [
                 {
                     "$match": {
@@ -376,28 +486,35 @@ class RecipeService:
 
     @classmethod
     def update_image(cls, id: PyObjectId, file: FileBlob) -> Recipe | None:
-        ret = cls.TABLE.find_one_and_update(
+        ret = cls._find_one_and_update(
             {"_id": id, "disabled": False},
             {
                 "$set": {
-                    "image": {
-                        "name": file.name,
-                        "url": file.url,
-                        "content_type": file.content_type,
-                    },
+                    "image": file.model_dump(),
+                    "date_update": datetime.utcnow(),
                 }
             },
-            return_document=ReturnDocument.AFTER,
         )
         if ret is not None:
             return Recipe(**ret)
         else:
             return None
 
+    @classmethod
+    def update_image_variants(cls, name: str, variants: List[FileVariant]) -> bool:
+        # every recipe still pointing at the source image shares its variants
+        fields = {
+            "image.variants": [item.model_dump() for item in variants],
+            "date_update": datetime.utcnow(),
+        }
+        ret = cls.TABLE.update_many({"image.name": name}, {"$set": fields})
+        RecipeCardService.update_many({"image.name": name}, fields)
+        return ret.matched_count > 0
+
     @classmethod
     def to_review_id_and_user(cls, item: RecipeInDB) -> Recipe | None:
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        ret = cls._find_one_and_update(
             {"_id": item.id, "publisher": item.publisher, "disabled": False},
             {
                 "$set": {
@@ -406,7 +523,6 @@ class RecipeService:
                     "username_update": item.username_update,
                 }
             },
-            return_document=ReturnDocument.AFTER,
         )
         if ret is not None:
             return Recipe(**ret)
@@ -416,7 +532,7 @@ class RecipeService:
     @classmethod
     def unpublish_id_and_user(cls, item: RecipeInDB) -> Recipe | None:
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        ret = cls._find_one_and_update(
             {"_id": item.id, "publisher": item.publisher, "disabled": False},
             {
                 "$set": {
@@ -426,7 +542,6 @@ class RecipeService:
                     "username_update": item.username_update,
                 }
             },
-            return_document=ReturnDocument.AFTER,
         )
         if ret is not None:
             return Recipe(**ret)
@@ -449,12 +564,110 @@ class RecipeService:
             delattr(item, "score")
 
         item.date_update = datetime.utcnow()
-        ret = cls.TABLE.find_one_and_update(
+        document = item.model_dump(by_alias=True)
+        document["geo"] = geo_point(item.lat, item.lng)
+        document.update(search_fields(item.name, item.description, item.tags))
+        ret = cls._find_one_and_update(
             {"_id": item.id, "disabled": False},
-            {"$set": item.model_dump(by_alias=True)},
-            return_document=ReturnDocument.AFTER,
+            {"$set": document},
         )
         if ret is not None:
             return Recipe(**ret)
         else:
             return None
+
+    @classmethod
+    def near_public(
+        cls,
+        lat: float,
+        lng: float,
+        max_distance: int,
+        n_per_page: int = 10,
+        cursor: str | None = None,
+        exclude_fields: dict = {},
+    ) -> tuple[List[RecipeNear], str | None]:
+        geo_near = {
+            "near": geo_point(lat, lng),
+            "distanceField": "distance",
+            "spherical": True,
+            "maxDistance": max_distance,
+            "query": {"disabled": False, "published": True},
+        }
+        pipeline = [{"$geoNear": geo_near}]
+        if cursor is not None:
+            last_distance, last_id = cls._decode_near_cursor(cursor)
+            geo_near["minDistance"] = last_distance
+            pipeline.append(
+                {
+                    "$match": {
+                        "$or": [
+                            {"distance": {"$gt": last_distance}},
+                            {"distance": last_distance, "_id": {"$gt": last_id}},
+                        ]
+                    }
+                }
+            )
+        # ties on equal coordinates are broken by _id so pages never overlap
+        pipeline.append({"$sort": {"distance": 1, "_id": 1}})
+        pipeline.append({"$limit": n_per_page + 1})
+        if exclude_fields:
+            pipeline.append({"$project": {**exclude_fields, "distance": 1}})
+        items = []
+        for find in cls.PUBLIC_TABLE.aggregate(pipeline):
+            items.append(RecipeNear(**find))
+        next_cursor = None
+        if len(items) > n_per_page:
+            items = items[:n_per_page]
+            last = items[-1]
+            next_cursor = encode_cursor([last.distance, str(last.id)])
+        return items, next_cursor
+
+    @classmethod
+    def within_public(
+        cls,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        n_per_page: int = 10,
+        cursor: str | None = None,
+        exclude_fields: dict = {},
+    ) -> tuple[List[Recipe], str | None]:
+        query = {
+            "disabled": False,
+            "published": True,
+            "geo": {
+                "$geoWithin": {"$geometry": geo_box(min_lat, min_lng, max_lat, max_lng)}
+            },
+        }
+        if cursor is not None:
+            query["_id"] = {"$gt": cls._decode_id_cursor(cursor)}
+        search = (
+            cls.PUBLIC_TABLE.find(query, exclude_fields)
+            .sort("_id", ASCENDING)
+            .limit(n_per_page + 1)
+        )
+        items = []
+        for find in search:
+            items.append(Recipe(**find))
+        next_cursor = None
+        if len(items) > n_per_page:
+            items = items[:n_per_page]
+            next_cursor = encode_cursor([str(items[-1].id)])
+        return items, next_cursor
+
+    @staticmethod
+    def _decode_near_cursor(cursor: str) -> tuple[float, ObjectId]:
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not isinstance(values[0], (int, float)):
+            raise ValueError("Invalid cursor")
+        if not ObjectId.is_valid(values[1]):
+            raise ValueError("Invalid cursor")
+        return float(values[0]), ObjectId(values[1])
+
+    @staticmethod
+    def _decode_id_cursor(cursor: str) -> ObjectId:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not ObjectId.is_valid(values[0]):
+            raise ValueError("Invalid cursor")
+        return ObjectId(values[0])
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.database import db
+from app.utils.exclusion_fields import RESULT_FORMAT
+
+# what the list views show plus every key they filter or search on
+CARD_FIELDS = (
+    set(RESULT_FORMAT.RECIPE_PUBLIC_SEARCH)
+    | set(RESULT_FORMAT.RECIPE_USER_PUBLIC_SEARCH)
+    | {
+        "disabled",
+        "category",
+        "date_insert",
+        "date_update",
+        "search_tokens",
+        "revision",
+    }
+)
+
+
+class RecipeCardService:
+    TABLE = db.recipe_cards
+    PUBLIC_TABLE = db.public("recipe_cards")
+
+    @classmethod
+    def create_indexes(cls):
+        cls.TABLE.create_index(
+            [("disabled", ASCENDING), ("published", ASCENDING)],
+            name="disabled_published",
+        )
+        cls.TABLE.create_index(
+            [
+                ("publisher", ASCENDING),
+                ("disabled", ASCENDING),
+                ("published", ASCENDING),
+                ("reviewed", ASCENDING),
+            ],
+            name="publisher_state",
+        )
+        cls.TABLE.create_index([("image.name", ASCENDING)], name="image_name")
+        cls.TABLE.create_index(
+            [("search_tokens", ASCENDING), ("published", ASCENDING)],
+            name="search_tokens",
+        )
+
+    @staticmethod
+    def card(document: dict) -> dict:
+        card = {key: document[key] for key in CARD_FIELDS if key in document}
+        card["date_sync"] = datetime.utcnow()
+        return card
+
+    @staticmethod
+    def covers(exclude_fields: dict) -> bool:
+        # only inclusion projections of card fields can be answered by a card
+        return (
+            len(exclude_fields) > 0
+            and all(exclude_fields.values())
+            and set(exclude_fields) <= CARD_FIELDS
+        )
+
+    @classmethod
+    def reader(cls, publisher: str = ""):
+        if publisher != "":
+            return cls.TABLE
+        return cls.PUBLIC_TABLE
+
+    @classmethod
+    def sync(cls, document: dict) -> tuple[bool, dict | None]:
+        # a card only moves forward: concurrent writes to a recipe can sync in
+        # any order and an older revision finds no card to update, its upsert
+        # then collides on _id. A deleted recipe keeps a disabled card so a
+        # late sync cannot bring it back; the list views filter it out and
+        # the recipe_cards migration removes it. $set rather than a replace
+        # so change events list the fields that changed. Returns whether the
+        # card moved and the card it replaced, the state listeners compare.
+        try:
+            before = cls.TABLE.find_one_and_update(
+                {
+                    "_id": document["_id"],
+                    "revision": {"$not": {"$gte": document.get("revision", 0)}},
+                },
+                {"$set": cls.card(document)},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            return False, None
+        return True, before
+
+    @classmethod
+    def update_many(cls, filter: dict, fields: dict):
+        cls.TABLE.update_many(
+            filter, {"$set": {**fields, "date_sync": datetime.utcnow()}}
+        )
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import Counter
+from typing import List
+
+from app.core import configuration
+from app.core.database import db
+from app.models.recipe import FacetCount, RecipeFacets
+
+FACET_FIELDS = ("tags", "category", "location", "year")
+# what on_change needs to know whether and how a recipe is counted
+STATE_FIELDS = {field: 1 for field in (*FACET_FIELDS, "published", "disabled")}
+
+
+class RecipeFacetService:
+    TABLE = db.recipe_cards
+    REFRESH_SECONDS = configuration.APP_FACETS_REFRESH_SECONDS
+    _counters: dict[str, Counter] | None = None
+    _refreshed_at: float = 0
+    _refreshing = False
+    _generation = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def filter_query(
+        tags: List[str] = [],
+        category: List[str] = [],
+        location: str | None = None,
+        year: int | None = None,
+    ) -> dict:
+        query = {}
+        if len(tags) > 0:
+            query["tags"] = {"$all": tags}
+        if len(category) > 0:
+            query["category"] = {"$all": category}
+        if location is not None:
+            query["location"] = location
+        if year is not None:
+            query["year"] = year
+        return query
+
+    @staticmethod
+    def pipeline(match: dict) -> list:
+        return [
+            {"$match": match},
+            {
+                "$facet": {
+                    "tags": [
+                        {"$unwind": "$tags"},
+                        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+                    ],
+                    "category": [
+                        {"$unwind": "$category"},
+                        {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                    ],
+                    "location": [
+                        {"$match": {"location": {"$nin": [None, ""]}}},
+                        {"$group": {"_id": "$location", "count": {"$sum": 1}}},
+                    ],
+                    "year": [
+                        {"$match": {"year": {"$gt": 0}}},
+                        {"$group": {"_id": "$year", "count": {"$sum": 1}}},
+                    ],
+                }
+            },
+        ]
+
+    @classmethod
+    def aggregate(cls, match: dict) -> dict[str, Counter]:
+        result = next(cls.TABLE.aggregate(cls.pipeline(match)), {})
+        counters = {}
+        for field in FACET_FIELDS:
+            counters[field] = Counter(
+                {find["_id"]: find["count"] for find in result.get(field, [])}
+            )
+        return counters
+
+    @classmethod
+    def search(cls, match: dict) -> RecipeFacets:
+        return cls.to_model(cls.aggregate(match))
+
+    @classmethod
+    def snapshot(cls) -> RecipeFacets:
+        with cls._lock:
+            counters = cls._counters
+            if counters is not None and (
+                cls._refreshing
+                or time.monotonic() - cls._refreshed_at <= cls.REFRESH_SECONDS
+            ):
+                return cls.to_model(counters)
+            cls._refreshing = True
+            generation = cls._generation
+        # the aggregate runs unlocked so writes (on_change) are not held up
+        # behind it, meanwhile other readers get the previous counters
+        try:
+            counters = cls.aggregate({"disabled": False, "published": True})
+        except Exception:
+            with cls._lock:
+                cls._refreshing = False
+            raise
+        with cls._lock:
+            cls._refreshing = False
+            cls._counters = counters
+            if generation == cls._generation:
+                cls._refreshed_at = time.monotonic()
+            else:
+                # invalidated while aggregating, refreshed again next time
+                cls._refreshed_at = 0
+            return cls.to_model(counters)
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._counters = None
+            cls._generation += 1
+
+    @classmethod
+    def on_change(cls, before: dict | None, after: dict | None):
+        # keep the snapshot in step with publish, unpublish, edit and delete
+        # without waiting for the next refresh
+        with cls._lock:
+            if cls._counters is None:
+                return
+            if cls._is_counted(before):
+                cls._apply(before, -1)
+            if cls._is_counted(after):
+                cls._apply(after, 1)
+
+    @staticmethod
+    def _is_counted(document: dict | None) -> bool:
+        return (
+            document is not None
+            and document.get("published") is True
+            and document.get("disabled") is not True
+        )
+
+    @classmethod
+    def _apply(cls, document: dict, delta: int):
+        for field, value in cls._values(document):
+            counter = cls._counters[field]
+            counter[value] += delta
+            if counter[value] <= 0:
+                del counter[value]
+
+    @staticmethod
+    def _values(document: dict) -> list:
+        values = []
+        for tag in document.get("tags") or []:
+            values.append(("tags", tag))
+        for category in document.get("category") or []:
+            values.append(("category", category))
+        if document.get("location") not in (None, ""):
+            values.append(("location", document["location"]))
+        if (document.get("year") or 0) > 0:
+            values.append(("year", document["year"]))
+        return values
+
+    @staticmethod
+    def to_model(counters: dict[str, Counter]) -> RecipeFacets:
+        facets = {}
+        for field in FACET_FIELDS:
+            facets[field] = [
+                FacetCount(value=value, count=count)
+                for value, count in sorted(
+                    counters[field].items(), key=lambda item: (-item[1], str(item[0]))
+                )
+            ]
+        return RecipeFacets(**facets)
@@ -0,0 +1,112 @@
+from typing import AsyncIterator, List
+
+from bson import ObjectId
+
+from app.metrics.profiling import run_in_threadpool
+from app.models.recipe import FileBlob, FileVariant, Recipe
+from app.services.blob import BlobService
+from app.services.job import JobService
+from app.services.recipe import RecipeService
+from app.storage import get_storage
+from app.utils import image_variants
+from app.utils.content_types import CONTENT_TYPES_IMAGE, CONTENT_TYPES_RESIZABLE
+from app.utils.upload_stream import read_limited
+
+
+class RecipeImageService:
+    @staticmethod
+    async def store(
+        chunks: AsyncIterator[bytes], content_type: str, max_bytes: int | None = None
+    ) -> tuple[FileBlob | None, bool]:
+        spool, digest, size = await read_limited(chunks, max_bytes)
+        with spool:
+            # identical content is already stored, reuse it without storage I/O
+            blob = BlobService.acquire(digest)
+            if blob is not None:
+                return blob, False
+            # a name per stored copy: a delete queued for an earlier copy of
+            # the same content can never remove this one
+            name = f"{digest}.{ObjectId()}.{CONTENT_TYPES_IMAGE[content_type]}"
+            result, filename, url, content_type = get_storage().upload(
+                name, content_type, spool
+            )
+            if not result:
+                return None, False
+        blob = BlobService.insert(
+            digest, FileBlob(name=filename, url=url, content_type=content_type)
+        )
+        if blob.name != filename:
+            # the same content was stored concurrently, keep that copy
+            await run_in_threadpool(get_storage().delete, filename)
+            return blob, False
+        return blob, True
+
+    @staticmethod
+    async def replace(
+        recipe: Recipe,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        max_bytes: int | None = None,
+    ) -> Recipe | None:
+        blob, created = await RecipeImageService.store(chunks, content_type, max_bytes)
+        if blob is None:
+            return recipe
+        # delete old image if exists after  upload new image
+        if recipe.image is not None:
+            RecipeImageService.delete(recipe.image)
+        updated = RecipeService.update_image(recipe.id, blob)
+        if created and blob.content_type in CONTENT_TYPES_RESIZABLE:
+            JobService.enqueue(
+                "image.variants",
+                {"image": blob.model_dump()},
+                key=f"image.variants:{blob.name}",
+            )
+        return updated
+
+    @staticmethod
+    async def generate_variants(image: FileBlob):
+        data = await run_in_threadpool(get_storage().read, image.name)
+        if data is None:
+            raise RuntimeError(f"Image not found: {image.name}")
+        rendered = await image_variants.build_variants(data)
+        variants: List[FileVariant] = []
+        for width, content_type, binary in rendered:
+            result, filename, url, content_type = await run_in_threadpool(
+                get_storage().upload_bytes,
+                image_variants.variant_name(image.name, width, content_type),
+                content_type,
+                binary,
+            )
+            if not result:
+                raise RuntimeError(f"Variant not uploaded: {image.name} {width}w")
+            variants.append(
+                FileVariant(
+                    name=filename, url=url, content_type=content_type, width=width
+                )
+            )
+        if len(variants) == 0:
+            return
+        stored = await run_in_threadpool(
+            BlobService.update_variants, image.name, variants
+        )
+        updated = await run_in_threadpool(
+            RecipeService.update_image_variants, image.name, variants
+        )
+        if not stored and not updated:
+            # the image was replaced while rendering, drop the orphans
+            for variant in variants:
+                await run_in_threadpool(get_storage().delete, variant.name)
+
+    @staticmethod
+    def delete(image: FileBlob) -> bool:
+        # shared content is only removed once no recipe references it
+        if not BlobService.release(image.name):
+            return False
+        return JobService.enqueue(
+            "storage.delete",
+            {
+                "name": image.name,
+                "names": [image.name] + [variant.name for variant in image.variants],
+            },
+            key=f"storage.delete:{image.name}",
+        )
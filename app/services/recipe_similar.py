@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import List
+
+from pymongo import ReplaceOne
+
+from app.core.database import db
+from app.models.recipe import RecipeSimilar
+from app.services.recipe_card import RecipeCardService
+from app.utils.exclusion_fields import RESULT_FORMAT
+from app.utils.mongo_validator import PyObjectId
+
+
+class RecipeSimilarService:
+    TABLE = db.recipe_similar
+    PUBLIC_TABLE = db.public("recipe_similar")
+
+    @classmethod
+    def get_public(cls, id: PyObjectId) -> List[RecipeSimilar]:
+        find = cls.PUBLIC_TABLE.find_one({"_id": id})
+        if find is None:
+            return []
+        similarity = {item["_id"]: item["similarity"] for item in find["similar"]}
+        # the lists are as old as the last run, only recipes (the requested
+        # one included) that are still published are shown, from their cards
+        search = RecipeCardService.PUBLIC_TABLE.find(
+            {
+                "_id": {"$in": [id, *similarity]},
+                "disabled": False,
+                "published": True,
+            },
+            RESULT_FORMAT.RECIPE_META,
+        )
+        cards = {card["_id"]: card for card in search}
+        if id not in cards:
+            return []
+        return [
+            RecipeSimilar(**cards[key], similarity=value)
+            for key, value in similarity.items()
+            if key in cards and key != id
+        ]
+
+    @classmethod
+    def replace_many(cls, items: List[dict], date_sync: datetime) -> int:
+        if len(items) == 0:
+            return 0
+        operations = [
+            ReplaceOne(
+                {"_id": item["_id"]},
+                {"similar": item["similar"], "date_sync": date_sync},
+                upsert=True,
+            )
+            for item in items
+        ]
+        cls.TABLE.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @classmethod
+    def delete_older(cls, date_sync: datetime) -> int:
+        # recipes unpublished or deleted since the previous run
+        return cls.TABLE.delete_many({"date_sync": {"$lt": date_sync}}).deleted_count
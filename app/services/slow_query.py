@@ -0,0 +1,42 @@
+from typing import List
+
+from pymongo import DESCENDING
+from pymongo.errors import CollectionInvalid
+
+from app.core import configuration
+from app.core.database import db
+from app.models.slow_query import SlowQuery
+
+
+class SlowQueryService:
+    NAME = "slow_queries"
+
+    @classmethod
+    def create_collection(cls):
+        try:
+            db.create_collection(
+                cls.NAME,
+                capped=True,
+                size=configuration.APP_SLOW_QUERY_CAPPED_MB * 1024 * 1024,
+            )
+        except CollectionInvalid:
+            pass
+
+    @classmethod
+    def insert(cls, item: SlowQuery):
+        if hasattr(item, "id"):
+            delattr(item, "id")
+        db[cls.NAME].insert_one(item.model_dump(by_alias=True))
+
+    @classmethod
+    def list(
+        cls, collection: str | None = None, n_per_page: int = 100
+    ) -> List[SlowQuery]:
+        query = {}
+        if collection is not None:
+            query["collection"] = collection
+        search = db[cls.NAME].find(query).sort("$natural", DESCENDING).limit(n_per_page)
+        items = []
+        for find in search:
+            items.append(SlowQuery(**find))
+        return items
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from jose import jws
+from pymongo import ASCENDING
 from pymongo.collection import ReturnDocument
 
 from app.core import configuration
@@ -12,6 +13,13 @@ SECRET = configuration.APP_SECRET_TOKENS
 
 
 class TokenService:
+    @staticmethod
+    def create_indexes():
+        db.token.create_index([("token", ASCENDING)], name="token")
+        db.token.create_index(
+            [("username", ASCENDING), ("disabled", ASCENDING)], name="username_disabled"
+        )
+
     @staticmethod
     def create(item: Token):
         item.date_insert = datetime.utcnow()
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 from jose import jwt, JWTError
+from pymongo import ASCENDING
 from pymongo.collection import ReturnDocument
 import uuid
 from app.core import configuration
@@ -13,6 +14,10 @@ TIME_EXPIRES = configuration.APP_TOKEN_EXPIRES
 
 
 class TokenPublicService:
+    @staticmethod
+    def create_indexes():
+        db.token_public.create_index([("jti", ASCENDING)], name="jti")
+
     @staticmethod
     def create(item: Token):
         item.date_insert = datetime.utcnow()
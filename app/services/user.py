@@ -1,50 +1,82 @@
 from datetime import datetime
-import random
 import re
 import string
 
+from pymongo import ASCENDING
 from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from app.core.database import db
+from app.core.database import create_unique_index, db
 from app.models.user import UserInDB
+from app.services.username_counter import UsernameCounterService
 
 
 class UserService:
+    # kept from the stored user when an existing user logs in again
+    PRESERVED_FIELDS = {"id", "username", "admin", "disabled", "date_insert"}
+
+    @staticmethod
+    def create_indexes():
+        create_unique_index(
+            db.user,
+            [("email", ASCENDING)],
+            "email_unique",
+            partialFilterExpression={"email": {"$type": "string"}},
+        )
+        create_unique_index(db.user, [("username", ASCENDING)], "username_unique")
+
+    @staticmethod
+    def username_base(user: UserInDB) -> str:
+        pattern = re.compile("[^%s]" % string.printable)
+        username_generated = f"{user.given_name}.{user.family_name}".lower()
+        username_generated = pattern.sub("", username_generated)
+        username_generated = re.sub(" +", " ", username_generated)
+        username_generated = username_generated.strip()
+        return username_generated.replace(" ", ".")
+
+    @staticmethod
+    def generate_username(user: UserInDB) -> str:
+        # discriminators come from a per-base counter, seeded past the random
+        # ones of older users by app.migrations.username_counters
+        base = UserService.username_base(user)
+        return f"{base}#{UsernameCounterService.next(base):04}"
+
     @staticmethod
     def insert_or_update_user(user: UserInDB) -> UserInDB:
-        if hasattr(user, "id"):
-            delattr(user, "id")
-        find = UserService.get_user(user)
-        if find is None:
-            exists_username = True
-            pattern = re.compile("[^%s]" % string.printable)
-            while exists_username:
-                username_generated = f"{user.given_name}.{user.family_name}".lower()
-                username_generated = pattern.sub("", username_generated)
-                username_generated = re.sub(" +", " ", username_generated)
-                username_generated = username_generated.strip()
-                username_generated = username_generated.replace(" ", ".")
-                username_generated = f"{username_generated}#{random.randint(1, 9999):04}"
-                exists_username = UserService.exists_username(username_generated)
-            user.username = username_generated
-            user.date_insert = datetime.utcnow()
-            ret = db.user.insert_one(user.model_dump(by_alias=True))
-            ret = db.user.find_one({"_id": ret.inserted_id})
-        else:
-            if hasattr(user, "date_insert"):
-                delattr(user, "date_insert")
-            if hasattr(user, "admin"):
-                delattr(user, "admin")
-            if hasattr(user, "username"):
-                delattr(user, "username")
-            user.date_update = datetime.utcnow()
-            user.disabled = find.disabled
-            ret = db.user.find_one_and_update(
-                {"email": user.email},
-                {"$set": user.model_dump(by_alias=True)},
-                return_document=ReturnDocument.AFTER,
-            )
-        return UserInDB(**ret)
+        user.date_update = datetime.utcnow()
+        fields = user.model_dump(by_alias=True, exclude=UserService.PRESERVED_FIELDS)
+        # a returning user costs a single write
+        ret = db.user.find_one_and_update(
+            {"email": user.email},
+            {"$set": fields},
+            return_document=ReturnDocument.AFTER,
+        )
+        if ret is not None:
+            return UserInDB(**ret)
+        inserted = user.model_dump(
+            by_alias=True, include=UserService.PRESERVED_FIELDS - {"id"}
+        )
+        inserted["date_insert"] = user.date_update
+        username = None
+        while True:
+            # only a new user takes a discriminator, the upsert turns into an
+            # update if a concurrent first login inserted the email meanwhile
+            if username is None:
+                username = UserService.generate_username(user)
+            inserted["username"] = username
+            try:
+                ret = db.user.find_one_and_update(
+                    {"email": user.email},
+                    {"$set": fields, "$setOnInsert": inserted},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return UserInDB(**ret)
+            except DuplicateKeyError as e:
+                # a taken username needs the next discriminator, a concurrent
+                # insert of the same email is retried as is and now updates
+                if "email" not in (e.details or {}).get("keyPattern", {}):
+                    username = None
 
     @staticmethod
     def get_user(user: UserInDB) -> UserInDB | None:
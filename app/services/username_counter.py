@@ -0,0 +1,18 @@
+from pymongo.collection import ReturnDocument
+
+from app.core.database import db
+
+
+class UsernameCounterService:
+    TABLE = db.username_counters
+
+    @classmethod
+    def next(cls, base: str) -> int:
+        # the upsert on _id is retried by the server if two first sign-ups race
+        ret = cls.TABLE.find_one_and_update(
+            {"_id": base},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return ret["seq"]
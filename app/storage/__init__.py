@@ -0,0 +1,37 @@
+from app.core import configuration
+from app.storage.base import StorageBackend
+
+_storage: StorageBackend | None = None
+
+
+def create_storage(backend: str = configuration.APP_STORAGE_BACKEND) -> StorageBackend:
+    if backend == "gcs":
+        from app.storage.gcs import GoogleCloudStorage
+
+        return GoogleCloudStorage(
+            configuration.APP_GOOGLE_CLOUD_STORAGE,
+            configuration.APP_GOOGLE_CLOUD_STORAGE_BUCKET,
+        )
+    if backend == "local":
+        from app.storage.local import LocalStorage
+
+        return LocalStorage(
+            configuration.APP_STORAGE_LOCAL_PATH, configuration.APP_STORAGE_PUBLIC_URL
+        )
+    if backend == "memory":
+        from app.storage.memory import MemoryStorage
+
+        return MemoryStorage(configuration.APP_STORAGE_PUBLIC_URL)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage: StorageBackend | None):
+    global _storage
+    _storage = storage
@@ -0,0 +1,25 @@
+import io
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def upload(
+        self, filename: str, content_type: str, binary: BinaryIO
+    ) -> tuple[bool, str | None, str | None, str | None]:
+        pass
+
+    def upload_bytes(
+        self, filename: str, content_type: str, data: bytes
+    ) -> tuple[bool, str | None, str | None, str | None]:
+        return self.upload(filename, content_type, io.BytesIO(data))
+
+    @abstractmethod
+    def read(self, filename: str) -> bytes | None:
+        pass
+
+    @abstractmethod
+    def delete(self, filename: str) -> bool:
+        # deleting a missing file succeeds so retried deletes are idempotent
+        pass
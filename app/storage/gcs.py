@@ -0,0 +1,57 @@
+from typing import BinaryIO
+
+from app.storage.base import StorageBackend
+
+
+class GoogleCloudStorage(StorageBackend):
+    def __init__(self, service_account_json: str, bucket_name: str):
+        self.service_account_json = service_account_json
+        self.bucket_name = bucket_name
+        self._bucket = None
+
+    @property
+    def bucket(self):
+        # client and bucket handle are built once, bucket() does not call the API
+        if self._bucket is None:
+            from google.cloud import storage
+
+            client = storage.Client.from_service_account_json(self.service_account_json)
+            self._bucket = client.bucket(self.bucket_name)
+        return self._bucket
+
+    def upload(self, filename: str, content_type: str, binary: BinaryIO):
+        try:
+            blob = self.bucket.blob(filename)
+            blob.upload_from_file(binary, content_type=content_type)
+            return True, filename, blob.public_url, blob.content_type
+        except Exception as e:
+            print(e)
+            return False, None, None, None
+
+    def upload_bytes(self, filename: str, content_type: str, data: bytes):
+        try:
+            blob = self.bucket.blob(filename)
+            blob.upload_from_string(data, content_type=content_type)
+            return True, filename, blob.public_url, blob.content_type
+        except Exception as e:
+            print(e)
+            return False, None, None, None
+
+    def read(self, filename: str) -> bytes | None:
+        try:
+            return self.bucket.blob(filename).download_as_bytes()
+        except Exception as e:
+            print(e)
+            return None
+
+    def delete(self, filename: str) -> bool:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.bucket.blob(filename).delete()
+            return True
+        except NotFound:
+            return True
+        except Exception as e:
+            print(e)
+            return False
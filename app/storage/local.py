@@ -0,0 +1,46 @@
+import os
+import shutil
+from typing import BinaryIO
+
+from app.storage.base import StorageBackend
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str, public_url: str):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, filename: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, filename))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError("Invalid filename")
+        return path
+
+    def upload(self, filename: str, content_type: str, binary: BinaryIO):
+        try:
+            path = self._path(filename)
+            with open(path, "wb") as output:
+                shutil.copyfileobj(binary, output)
+            return True, filename, f"{self.public_url}/{filename}", content_type
+        except Exception as e:
+            print(e)
+            return False, None, None, None
+
+    def read(self, filename: str) -> bytes | None:
+        try:
+            with open(self._path(filename), "rb") as binary:
+                return binary.read()
+        except Exception as e:
+            print(e)
+            return None
+
+    def delete(self, filename: str) -> bool:
+        try:
+            os.remove(self._path(filename))
+            return True
+        except FileNotFoundError:
+            return True
+        except Exception as e:
+            print(e)
+            return False
@@ -0,0 +1,21 @@
+from typing import BinaryIO
+
+from app.storage.base import StorageBackend
+
+
+class MemoryStorage(StorageBackend):
+    def __init__(self, public_url: str):
+        self.public_url = public_url.rstrip("/")
+        self.files: dict[str, tuple[str, bytes]] = {}
+
+    def upload(self, filename: str, content_type: str, binary: BinaryIO):
+        self.files[filename] = (content_type, binary.read())
+        return True, filename, f"{self.public_url}/{filename}", content_type
+
+    def read(self, filename: str) -> bytes | None:
+        find = self.files.get(filename)
+        return find[1] if find is not None else None
+
+    def delete(self, filename: str) -> bool:
+        self.files.pop(filename, None)
+        return True
@@ -1,10 +1,20 @@
-CONTENT_TYPES_IMAGE = [
-    "image/apng",
+# accepted image content types and the extension their files are stored with
+CONTENT_TYPES_IMAGE = {
+    "image/apng": "apng",
+    "image/avif": "avif",
+    "image/gif": "gif",
+    "image/jpeg": "jpeg",
+    "image/png": "png",
+    "image/svg": "svg",
+    "image/svg+xml": "svg",
+    "image/webp": "webp",
+}
+CONTENT_TYPES_VALID = ["JPEG", "JPG", "PNG", "SVG", "GIF", "WEBP", "APNG", "AVIF"]
+# formats that can be decoded and resized into variants, animated and vector
+# images are served as uploaded
+CONTENT_TYPES_RESIZABLE = [
     "image/avif",
-    "image/gif",
     "image/jpeg",
     "image/png",
-    "image/svg",
     "image/webp",
 ]
-CONTENT_TYPES_VALID = ["JPEG", "JPG", "PNG", "SVG", "GIF", "WEBP", "APNG", "AVIF"]
@@ -0,0 +1,22 @@
+def geo_point(lat: float | None, lng: float | None) -> dict | None:
+    if lat is None or lng is None:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    # GeoJSON coordinates are ordered [longitude, latitude]
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def geo_box(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> dict:
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [min_lng, min_lat],
+                [max_lng, min_lat],
+                [max_lng, max_lat],
+                [min_lng, max_lat],
+                [min_lng, min_lat],
+            ]
+        ],
+    }
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from app.core import configuration
+
+
+def entity_tag(id, modified: datetime, variant: str = "") -> str:
+    millis = int(modified.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    suffix = f".{variant}" if variant != "" else ""
+    return f'"{id}.{millis}{suffix}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), True)
+
+
+def cache_headers(
+    etag: str,
+    modified: datetime,
+    max_age: int = configuration.APP_RECIPE_CACHE_MAX_AGE,
+    stale: int = configuration.APP_RECIPE_CACHE_STALE_SECONDS,
+) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": http_date(modified),
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale}",
+    }
+
+
+def not_modified(headers, etag: str, modified: datetime) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
@@ -0,0 +1,87 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+from app.core.configuration import (
+    APP_IMAGE_VARIANT_FORMATS,
+    APP_IMAGE_VARIANT_WIDTHS,
+    APP_IMAGE_WORKERS,
+)
+from app.utils.content_types import CONTENT_TYPES_IMAGE
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", "image/avif", {"quality": 60, "speed": 8}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True}),
+}
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def available_formats(formats: list[str]) -> list[str]:
+    return [
+        fmt
+        for fmt in formats
+        if fmt in FORMATS and (fmt != "avif" or features.check("avif"))
+    ]
+
+
+def render_variants(
+    data: bytes, widths: list[int], formats: list[str]
+) -> list[tuple[int, str, bytes]]:
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        # any alpha band (LA, PA, RGBa) or transparency key keeps its alpha
+        if image.has_transparency_data:
+            if image.mode != "RGBA":
+                image = image.convert("RGBA")
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        # never upscale, images narrower than every width get a single variant
+        targets = sorted({width for width in widths if width < image.width})
+        if len(targets) == 0:
+            targets = [image.width]
+        variants = []
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in available_formats(formats):
+                pil_format, content_type, options = FORMATS[fmt]
+                frame = resized
+                if pil_format == "JPEG" and frame.mode != "RGB":
+                    frame = frame.convert("RGB")
+                output = io.BytesIO()
+                frame.save(output, pil_format, **options)
+                variants.append((width, content_type, output.getvalue()))
+        return variants
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=APP_IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def build_variants(
+    data: bytes,
+    widths: list[int] = APP_IMAGE_VARIANT_WIDTHS,
+    formats: list[str] = APP_IMAGE_VARIANT_FORMATS,
+) -> list[tuple[int, str, bytes]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), render_variants, data, widths, formats
+    )
+
+
+def variant_name(name: str, width: int, content_type: str) -> str:
+    return f"{name}.{width}w.{CONTENT_TYPES_IMAGE[content_type]}"
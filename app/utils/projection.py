@@ -0,0 +1,53 @@
+from functools import lru_cache
+from typing import Iterable, List
+
+from pydantic import BaseModel, create_model
+
+
+class InvalidFields(ValueError):
+    def __init__(self, names: List[str]):
+        super().__init__(f"Invalid fields: {', '.join(names)}")
+        self.names = names
+
+
+def model_keys(model: type[BaseModel]) -> List[str]:
+    # stored and serialized names, _id instead of id
+    return [info.alias or name for name, info in model.model_fields.items()]
+
+
+def parse_fields(fields: str | None, allowed: Iterable[str]) -> tuple | None:
+    if fields is None or fields.strip() == "":
+        return None
+    allowed = set(allowed)
+    names = []
+    invalid = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name == "" or name in names:
+            continue
+        if name not in allowed:
+            invalid.append(name)
+        names.append(name)
+    if len(invalid) > 0:
+        raise InvalidFields(invalid)
+    if "_id" not in names:
+        names.insert(0, "_id")
+    return tuple(names)
+
+
+def projection(names: tuple) -> dict:
+    return {name: 1 for name in names}
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: type[BaseModel], names: tuple) -> type[BaseModel]:
+    definitions = {}
+    for name, info in model.model_fields.items():
+        if (info.alias or name) in names:
+            definitions[name] = (info.annotation, info)
+    return create_model(f"{model.__name__}Fields", __base__=BaseModel, **definitions)
+
+
+def dump_partial(items: List[BaseModel]) -> List[dict]:
+    # the services validate the documents straight into the partial model
+    return [item.model_dump(mode="json", by_alias=True) for item in items]
@@ -0,0 +1,45 @@
+import re
+import unicodedata
+from typing import Iterable
+
+TOKEN = re.compile(r"\w+")
+
+
+def fold(text: str | None) -> str:
+    # "Piqué Macho" -> "pique macho", ñ folds to n like the accents
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.casefold()
+
+
+def tokens(*texts: str | None) -> list[str]:
+    found = []
+    for text in texts:
+        for token in TOKEN.findall(fold(text)):
+            if token not in found:
+                found.append(token)
+    return found
+
+
+def search_fields(
+    name: str | None, description: str | None, tags: Iterable[str] | None
+) -> dict:
+    return {
+        "search_name": tokens(name),
+        "search_tokens": tokens(name, description, *(tags or [])),
+    }
+
+
+def search_query(q: str, field: str = "search_tokens") -> dict:
+    # every word must match a token, the last one as a prefix so the
+    # search works while typing, all of them answered by the multikey index
+    words = tokens(q)
+    if len(words) == 0:
+        return {}
+    conditions = [{field: word} for word in words[:-1]]
+    conditions.append({field: {"$regex": f"^{re.escape(words[-1])}"}})
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
@@ -0,0 +1,88 @@
+import copy
+import inspect
+import threading
+from functools import wraps
+
+from app.metrics.registry import Counter
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total", "Calls made through a single-flight group", ("name",)
+)
+SINGLE_FLIGHT_COALESCED = Counter(
+    "single_flight_coalesced_total",
+    "Calls that shared the result of an identical call in flight",
+    ("name",),
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Exception | None = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        SINGLE_FLIGHT_CALLS.inc((self.name,))
+        if not leader:
+            SINGLE_FLIGHT_COALESCED.inc((self.name,))
+            call.done.wait()
+            if call.error is not None:
+                # a copy, raising the same instance from every thread would
+                # chain all their tracebacks onto it
+                raise copy.copy(call.error)
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # callers arriving after this point run a new query, so nobody
+            # gets a result older than their own request
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def single_flight(name: str):
+    # identical concurrent calls (same arguments once defaults are applied)
+    # wait for the one in flight and share its result, which must be
+    # treated as read only
+    group = SingleFlight(name)
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return group.do(freeze(bound.arguments), fn, *args, **kwargs)
+
+        wrapper.group = group
+        return wrapper
+
+    return decorator
@@ -0,0 +1,51 @@
+import hashlib
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def read_limited(
+    chunks: AsyncIterator[bytes], max_bytes: int | None = None
+) -> tuple[SpooledTemporaryFile, str, int]:
+    # the limit is enforced on the bytes actually received, never on headers
+    spool = SpooledTemporaryFile(max_size=max_bytes or 8 * 1024 * 1024)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                raise UploadTooLarge()
+            digest.update(chunk)
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, digest.hexdigest(), size
+
+
+def content_length_allowed(headers, max_bytes: int) -> bool:
+    # early rejection only, the body is still counted while it is read
+    value = headers.get("content-length")
+    if value is None:
+        return True
+    try:
+        return int(value) <= max_bytes
+    except ValueError:
+        return False
@@ -0,0 +1,268 @@
+import argparse
+import itertools
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from app.migrations import recipe_cards, recipe_search_keys
+from app.models.page import PageInDB
+from app.models.recipe import FileBlob, Ingredient, Preparation, RecipeInDB, Step
+from app.models.token import Token
+from app.models.user import UserInDB
+from app.utils.geo import geo_point
+
+BATCH_SIZE = 5000
+DISHES = [
+    "pique macho",
+    "salteña",
+    "sopa de maní",
+    "chairo",
+    "silpancho",
+    "api morado",
+    "buñuelo",
+    "charque",
+    "fricasé",
+    "sajta de pollo",
+    "majadito",
+    "locro",
+    "picante de lengua",
+    "anticucho",
+    "humintas",
+    "tucumana",
+    "cuñapé",
+    "sonso de yuca",
+    "chicharrón",
+    "ají de fideo",
+]
+INGREDIENTS = [
+    ("papa", "kg", "unidad"),
+    ("chuño", "g", "taza"),
+    ("carne de res", "kg", "porción"),
+    ("pollo", "kg", "presa"),
+    ("cebolla", "g", "unidad"),
+    ("tomate", "g", "unidad"),
+    ("ají amarillo", "g", "cucharada"),
+    ("maní", "g", "taza"),
+    ("maíz morado", "g", "taza"),
+    ("queso", "g", "taza"),
+    ("arroz", "kg", "taza"),
+    ("leche", "ml", "taza"),
+    ("aceite", "ml", "cucharada"),
+    ("sal", "g", "pizca"),
+    ("comino", "mg", "pizca"),
+    ("yuca", "kg", "unidad"),
+]
+VERBS = ["Picar", "Hervir", "Freír", "Mezclar", "Hornear", "Servir", "Sazonar"]
+TAGS = [
+    "carne",
+    "sopa",
+    "postre",
+    "desayuno",
+    "picante",
+    "vegetariano",
+    "fiesta",
+    "tradicional",
+    "rápido",
+    "horno",
+]
+CATEGORIES = ["principal", "entrada", "sopa", "postre", "bebida", "merienda"]
+LOCATIONS = [
+    ("La Paz", -16.50, -68.15),
+    ("Cochabamba", -17.39, -66.16),
+    ("Santa Cruz", -17.78, -63.18),
+    ("Oruro", -17.97, -67.11),
+    ("Potosí", -19.58, -65.75),
+    ("Sucre", -19.04, -65.26),
+    ("Tarija", -21.53, -64.73),
+    ("Trinidad", -14.83, -64.90),
+    ("Cobija", -11.03, -68.77),
+]
+# published, rejected, not_reviewed and not_requested review states
+STATES = [
+    ((True, True), 55),
+    ((False, True), 10),
+    ((False, False), 15),
+    ((False, None), 20),
+]
+
+
+def publisher_name(rank: int) -> str:
+    return f"cocinero.{rank}#{rank % 10000:04}"
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> list[float]:
+    return list(
+        itertools.accumulate(1 / (rank**exponent) for rank in range(1, count + 1))
+    )
+
+
+def recipe(rng: random.Random, publisher: str, date: datetime) -> dict:
+    dish = rng.choice(DISHES)
+    location, lat, lng = rng.choice(LOCATIONS)
+    (published, reviewed) = rng.choices(
+        [state for state, _ in STATES], [weight for _, weight in STATES]
+    )[0]
+    preparation = []
+    for index in range(rng.choices([1, 2, 3], [70, 25, 5])[0]):
+        ingredients = []
+        for name, unit, equivalence in rng.sample(INGREDIENTS, rng.randint(3, 12)):
+            quantity = round(rng.uniform(0.05, 2), 2)
+            ingredients.append(
+                Ingredient(
+                    name=name,
+                    optional=rng.random() < 0.1,
+                    quantity_si=quantity,
+                    unit_si=unit,
+                    quantity_equivalence=max(1, round(quantity * 4)),
+                    unit_equivalence=equivalence,
+                )
+            )
+        steps = [
+            Step(detail=f"{rng.choice(VERBS)} {rng.choice(INGREDIENTS)[0]}")
+            for _ in range(rng.randint(3, 10))
+        ]
+        preparation.append(
+            Preparation(
+                name="principal" if index == 0 else f"parte {index + 1}",
+                ingredients=ingredients,
+                steps=steps,
+            )
+        )
+    image = None
+    if rng.random() < 0.7:
+        digest = f"{rng.getrandbits(256):064x}"
+        image = FileBlob(
+            name=f"{digest}.jpeg",
+            url=f"https://storage.googleapis.com/catalog/{digest}.jpeg",
+            content_type="image/jpeg",
+        )
+    item = RecipeInDB(
+        name=f"{dish.capitalize()} {rng.choice(['casero', 'de la abuela', location])}",
+        description=f"Receta de {dish} al estilo de {location}, "
+        + " ".join(rng.sample(TAGS, 3)),
+        lang="es",
+        owner=publisher,
+        publisher=publisher,
+        tags=rng.sample(TAGS, rng.choices([1, 2, 3, 4], [20, 40, 30, 10])[0]),
+        year=rng.choice([0, rng.randint(1900, 2023)]),
+        location=location,
+        category=rng.sample(CATEGORIES, rng.choices([1, 2], [80, 20])[0]),
+        portion=rng.randint(1, 12),
+        preparation_time_minutes=rng.choice([15, 30, 45, 60, 90, 120, 240]),
+        score=rng.randint(0, 5),
+        preparation=preparation,
+        image=image,
+        published=published,
+        reviewed=reviewed,
+        lat=lat + rng.uniform(-0.3, 0.3),
+        lng=lng + rng.uniform(-0.3, 0.3),
+        disabled=rng.random() < 0.02,
+        date_insert=date,
+        username_insert=publisher,
+    )
+    document = item.model_dump(by_alias=True)
+    del document["_id"]
+    document["geo"] = geo_point(item.lat, item.lng)
+    return document
+
+
+def recipes(count: int, publishers: int, seed: int = 1) -> Iterator[dict]:
+    rng = random.Random(seed)
+    weights = zipf_weights(publishers)
+    start = datetime(2020, 1, 1)
+    for _ in range(count):
+        # a few prolific publishers own most of the catalog
+        rank = rng.choices(range(1, publishers + 1), cum_weights=weights)[0]
+        date = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 4))
+        yield recipe(rng, publisher_name(rank), date)
+
+
+def users(publishers: int) -> Iterator[dict]:
+    for rank in range(1, publishers + 1):
+        yield UserInDB(
+            username=publisher_name(rank),
+            email=f"cocinero.{rank}@example.com",
+            given_name="Cocinero",
+            family_name=str(rank),
+            disabled=rank % 50 == 0,
+            date_insert=datetime.utcnow(),
+        ).model_dump(by_alias=True, exclude={"id"})
+
+
+def tokens(publishers: int) -> Iterator[dict]:
+    for rank in range(1, publishers + 1):
+        yield Token(
+            username=publisher_name(rank),
+            token=uuid.uuid4().hex,
+            jti=str(uuid.uuid4()),
+            expires=datetime.utcnow() + timedelta(days=1),
+            disabled=rank % 3 == 0,
+            date_insert=datetime.utcnow(),
+        ).model_dump(by_alias=True, exclude={"id"})
+
+
+def pages(count: int) -> Iterator[dict]:
+    for index in range(count):
+        yield PageInDB(
+            slug=f"pagina-{index}",
+            title=f"Página {index}",
+            html=f"<h1>Página {index}</h1>",
+            disabled=index % 20 == 0,
+            date_insert=datetime.utcnow(),
+        ).model_dump(by_alias=True, exclude={"id"})
+
+
+def load(collection, documents: Iterator[dict]) -> int:
+    inserted = 0
+    while True:
+        batch = list(itertools.islice(documents, BATCH_SIZE))
+        if len(batch) == 0:
+            return inserted
+        inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+
+
+def generate(db, count: int, publishers: int, seed: int = 1):
+    load(db.user, users(publishers))
+    load(db.token, tokens(publishers))
+    load(db.token_public, tokens(publishers))
+    load(db.pages, pages(max(10, publishers // 10)))
+    start = time.perf_counter()
+    inserted = load(db.recipe, recipes(count, publishers, seed))
+    elapsed = time.perf_counter() - start
+    print(
+        f"Recipes inserted: {inserted} in {elapsed:.1f}s ({inserted / elapsed:.0f}/s)"
+    )
+    recipe_search_keys.run()
+    synced, _ = recipe_cards.run()
+    print(f"Recipe cards synced: {synced}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load a synthetic catalog")
+    parser.add_argument("--recipes", type=int, default=1_000_000)
+    parser.add_argument("--publishers", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--drop", action="store_true", help="drop the loaded collections first"
+    )
+    args = parser.parse_args()
+
+    from app.core.database import db
+
+    if args.drop:
+        for name in (
+            "recipe",
+            "recipe_cards",
+            "user",
+            "token",
+            "token_public",
+            "pages",
+        ):
+            db.drop_collection(name)
+    generate(db, args.recipes, args.publishers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import statistics
+import threading
+import time
+
+from bson import ObjectId
+
+from app.changes import SUBSCRIBERS, subscribe
+from app.changes.listener import ChangeStreamListener
+from app.core.database import db
+from app.models.change import ChangeEvent
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Change stream invalidation latency, needs a replica set"
+    )
+    parser.add_argument("--writes", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=5)
+    args = parser.parse_args()
+
+    received: dict[ObjectId, float] = {}
+    arrived = threading.Condition()
+
+    @subscribe("recipe")
+    def record(event: ChangeEvent):
+        with arrived:
+            received.setdefault(event.id, time.perf_counter())
+            arrived.notify_all()
+
+    listener = ChangeStreamListener(name="benchmark")
+    listener.start()
+    # the stream is opened on the listener thread
+    time.sleep(2)
+    latencies = []
+    missed = 0
+    try:
+        for _ in range(args.writes):
+            id = ObjectId()
+            start = time.perf_counter()
+            db.recipe.insert_one({"_id": id, "name": "benchmark", "disabled": True})
+            with arrived:
+                if not arrived.wait_for(lambda: id in received, args.timeout):
+                    missed += 1
+                    continue
+            latencies.append(received[id] - start)
+    finally:
+        listener.stop()
+        SUBSCRIBERS["recipe"].remove(record)
+        db.recipe.delete_many({"name": "benchmark", "disabled": True})
+
+    if len(latencies) == 0:
+        print(f"no events received in {args.timeout}s, is this a replica set?")
+        return
+    latencies.sort()
+    print(
+        f"writes={args.writes} missed={missed} "
+        f"p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f}ms "
+        f"max={latencies[-1] * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
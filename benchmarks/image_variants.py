@@ -0,0 +1,66 @@
+import argparse
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from app.core.configuration import APP_IMAGE_VARIANT_FORMATS, APP_IMAGE_VARIANT_WIDTHS
+from app.utils.image_variants import available_formats, render_variants
+
+
+def sample_image(width: int, height: int) -> bytes:
+    image = Image.radial_gradient("L").resize((width, height))
+    image = Image.merge(
+        "RGB", (image, image.transpose(Image.Transpose.FLIP_LEFT_RIGHT), image)
+    )
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=92)
+    return output.getvalue()
+
+
+def run(images: int, workers: int, data: bytes) -> float:
+    start = time.perf_counter()
+    if workers <= 1:
+        for _ in range(images):
+            render_variants(data, APP_IMAGE_VARIANT_WIDTHS, APP_IMAGE_VARIANT_FORMATS)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    render_variants,
+                    data,
+                    APP_IMAGE_VARIANT_WIDTHS,
+                    APP_IMAGE_VARIANT_FORMATS,
+                )
+                for _ in range(images)
+            ]
+            for future in futures:
+                future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image variant throughput")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    data = sample_image(args.width, args.height)
+    formats = available_formats(APP_IMAGE_VARIANT_FORMATS)
+    print(
+        f"source {args.width}x{args.height} ({len(data) / 1024:.0f} KiB), "
+        f"widths {APP_IMAGE_VARIANT_WIDTHS}, formats {formats}"
+    )
+    for workers in args.workers:
+        elapsed = run(args.images, workers, data)
+        print(
+            f"workers={workers:<3} images={args.images:<5} "
+            f"elapsed={elapsed:8.2f}s  throughput={args.images / elapsed:8.2f} images/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
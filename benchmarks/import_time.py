@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# modules that belong to lazily created clients and must not load on import
+DEFERRED_MODULES = ("authlib", "google.cloud.storage")
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+from app.core import database
+print(json.dumps({
+    "elapsed_ms": elapsed * 1000,
+    "client_created": database._client is not None,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def probe(module_times: bool) -> tuple[dict, list[tuple[int, str]]]:
+    command = [sys.executable]
+    if module_times:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE % (DEFERRED_MODULES,)]
+    result = subprocess.run(
+        command, capture_output=True, text=True, env=os.environ.copy(), check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            modules.append((int(cumulative), name.rstrip()))
+    return json.loads(result.stdout.strip().splitlines()[-1]), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time budget for app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings = []
+    failed = []
+    for _ in range(args.runs):
+        result, _ = probe(False)
+        timings.append(result["elapsed_ms"])
+    median = statistics.median(timings)
+
+    result, modules = probe(True)
+    print(f"import app.main: median {median:.0f} ms over {args.runs} runs")
+    print(f"slowest packages and app modules (cumulative, top {args.top}):")
+    # the application modules and the third-party packages they pull in
+    names = [
+        (cumulative, name.strip())
+        for cumulative, name in modules
+        if "." not in name.strip() or name.strip().startswith("app.")
+    ]
+    for cumulative, name in sorted(names, reverse=True)[: args.top]:
+        print(f"  {cumulative / 1000:>8.1f} ms {name}")
+
+    if median > args.budget_ms:
+        failed.append(f"median {median:.0f} ms > budget {args.budget_ms:.0f} ms")
+    if result["client_created"]:
+        failed.append("the Mongo client was created at import time")
+    if len(result["loaded"]) > 0:
+        failed.append(f"deferred modules imported: {', '.join(result['loaded'])}")
+    for message in failed:
+        print(f"FAIL {message}")
+    if len(failed) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# the app reads its configuration at import time
+os.environ.setdefault("APP_STORAGE_BACKEND", "memory")
+os.environ.setdefault("APP_JOBS_ENABLED", "false")
+# every simulated user shares one client address
+os.environ.setdefault("APP_RATE_LIMIT_ENABLED", "false")
+
+WORDS = [
+    "pique",
+    "macho",
+    "salteña",
+    "sopa",
+    "maní",
+    "chairo",
+    "silpancho",
+    "api",
+    "buñuelo",
+    "charque",
+    "fricasé",
+    "llajua",
+]
+TAGS = ["carne", "sopa", "postre", "desayuno", "picante", "vegetariano", "fiesta"]
+LOCATIONS = ["La Paz", "Cochabamba", "Santa Cruz", "Oruro", "Potosí", "Sucre"]
+
+
+def use_stand_in():
+    import mongomock
+    import pymongo
+
+    class StandInClient(mongomock.MongoClient):
+        def __init__(self, *args, event_listeners=None, **kwargs):
+            super().__init__(*args, **kwargs)
+
+    find = mongomock.collection.Collection.find
+
+    # mongomock edits the projection while it runs, the services share their
+    # projection dicts across the threadpool
+    def find_copy(self, filter=None, projection=None, *args, **kwargs):
+        if isinstance(projection, dict):
+            projection = dict(projection)
+        return find(self, filter, projection, *args, **kwargs)
+
+    mongomock.collection.Collection.find = find_copy
+    pymongo.MongoClient = StandInClient
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def sample_recipe(rng: random.Random) -> dict:
+    name = " ".join(rng.sample(WORDS, 2)).title()
+    return {
+        "name": name,
+        "description": f"Receta de {name.lower()} " + " ".join(rng.sample(WORDS, 5)),
+        "lang": "es",
+        "owner": "loadtest",
+        "tags": rng.sample(TAGS, 2),
+        "year": rng.randint(1950, 2023),
+        "location": rng.choice(LOCATIONS),
+        "category": ["principal"],
+        "portion": rng.randint(1, 8),
+        "preparation_time_minutes": rng.randint(10, 240),
+        "preparation": [
+            {
+                "name": "principal",
+                "ingredients": [
+                    {
+                        "name": rng.choice(WORDS),
+                        "quantity_si": 0.5,
+                        "unit_si": "kg",
+                        "quantity_equivalence": 1,
+                        "unit_equivalence": "taza",
+                    }
+                    for _ in range(6)
+                ],
+                "steps": [{"detail": " ".join(rng.sample(WORDS, 6))}] * 5,
+            }
+        ],
+        "lat": -16.5 + rng.uniform(-3, 3),
+        "lng": -65.0 + rng.uniform(-4, 4),
+    }
+
+
+def seed(recipes: int, rng: random.Random) -> dict:
+    from app.models.recipe import RecipeInDB
+    from app.models.token import Token
+    from app.models.user import UserInDB
+    from app.services.recipe import RecipeService
+    from app.services.token_public import TokenPublicService
+    from app.services.user import UserService
+
+    user = UserService.insert_or_update_user(
+        UserInDB(
+            username="",
+            email="loadtest@example.com",
+            given_name="Load",
+            family_name="Test",
+        )
+    )
+    generated, token = TokenPublicService.create(
+        Token(username=user.username, token="")
+    )
+    public_ids = []
+    for index in range(recipes):
+        item = RecipeInDB(**sample_recipe(rng))
+        item.username_insert = "loadtest"
+        item.publisher = user.username if index % 10 == 0 else "other"
+        inserted = RecipeService.insert(item=item)
+        if index % 5 != 0:
+            item = RecipeInDB()
+            item.id = inserted.id
+            item.username_update = "loadtest"
+            RecipeService.publish(item=item, published=True)
+            public_ids.append(str(inserted.id))
+    return {"token": token, "public_ids": public_ids, "user_ids": []}
+
+
+def sample_image() -> bytes:
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new("RGB", (1200, 900), (200, 120, 40)).save(output, "JPEG", quality=85)
+    return output.getvalue()
+
+
+class Scenarios:
+    def __init__(self, state: dict, rng: random.Random):
+        self.state = state
+        self.rng = rng
+        self.headers = {"Authorization": f"Bearer {state['token']}"}
+        self.image = sample_image()
+
+    async def browse(self, client):
+        page = self.rng.randint(0, 5)
+        return await client.get(f"/api/recipe/public?page={page}&size=10")
+
+    async def search(self, client):
+        word = self.rng.choice(WORDS)
+        return await client.get(f"/api/recipe/public?search={word}&size=10")
+
+    async def detail(self, client):
+        id = self.rng.choice(self.state["public_ids"])
+        return await client.get(f"/api/recipe/public/{id}")
+
+    async def user_list(self, client):
+        state = self.rng.choice(
+            ["published", "rejected", "not_reviewed", "not_requested"]
+        )
+        return await client.get(
+            f"/api/recipe/user/public?state={state}", headers=self.headers
+        )
+
+    async def user_create(self, client):
+        response = await client.post(
+            "/api/recipe/user/public",
+            json=sample_recipe(self.rng),
+            headers=self.headers,
+        )
+        if response.status_code == 201:
+            self.state["user_ids"].append(response.json()["_id"])
+        return response
+
+    async def user_upload(self, client):
+        if len(self.state["user_ids"]) == 0:
+            return await self.user_create(client)
+        id = self.rng.choice(self.state["user_ids"])
+        return await client.patch(
+            f"/api/recipe/user/public/{id}/image",
+            files={"file": ("photo.jpg", self.image, "image/jpeg")},
+            headers=self.headers,
+        )
+
+    def weighted(self) -> list[tuple[str, int]]:
+        return [
+            ("browse", 40),
+            ("search", 20),
+            ("detail", 25),
+            ("user_list", 8),
+            ("user_create", 4),
+            ("user_upload", 3),
+        ]
+
+
+async def run(args, state: dict) -> dict:
+    import httpx
+
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    scenarios = Scenarios(state, rng)
+    names, weights = zip(*scenarios.weighted())
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {name: 0 for name in names}
+    deadline = time.perf_counter() + args.duration
+
+    async def user(client):
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(scenarios, name)(client)
+                failed = response.status_code >= 400
+            except Exception as e:
+                print(e)
+                failed = True
+            latencies[name].append(time.perf_counter() - start)
+            if failed:
+                errors[name] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[user(client) for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+
+    report = {"duration": elapsed, "concurrency": args.concurrency, "endpoints": {}}
+    for name in names:
+        values = latencies[name]
+        if len(values) == 0:
+            continue
+        report["endpoints"][name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "throughput": len(values) / elapsed,
+            "mean_ms": statistics.fmean(values) * 1000,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    return report
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    print(
+        f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'req/s':>9} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for name, values in report["endpoints"].items():
+        line = (
+            f"{name:<12} {values['requests']:>9} {values['errors']:>7} "
+            f"{values['throughput']:>9.1f} {values['p50_ms']:>9.2f} "
+            f"{values['p95_ms']:>9.2f} {values['p99_ms']:>9.2f}"
+        )
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous is not None:
+            change = (values["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+            line += f"  p95 {change:+.1%} vs baseline"
+        print(line)
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    failed = []
+    for name, values in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        if values["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            failed.append(name)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API in process")
+    parser.add_argument(
+        "--mongo",
+        choices=["local", "stand-in"],
+        default="local",
+        help="local uses APP_MONGO_URI, stand-in uses mongomock",
+    )
+    parser.add_argument(
+        "--database",
+        default="loadtest",
+        help="database dropped and seeded for the run",
+    )
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the report as a baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed p95 regression against the baseline",
+    )
+    args = parser.parse_args()
+
+    if args.mongo == "stand-in":
+        use_stand_in()
+    os.environ["APP_MONGO_DB"] = args.database
+
+    from app.core.database import db, get_client
+    from app.services.recipe import RecipeService
+
+    get_client().drop_database(db.name)
+    if args.mongo == "local":
+        RecipeService.create_indexes()
+    state = seed(args.recipes, random.Random(args.seed))
+    report = asyncio.run(run(args, state))
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+    if baseline is not None:
+        failed = regressions(report, baseline, args.tolerance)
+        if len(failed) > 0:
+            print(f"p95 regression over {args.tolerance:.0%}: {', '.join(failed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+
+import pydantic
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from app.models.recipe import Recipe, RecipeInDB, RecipePublic
+from app.utils.mongo_validator import PyObjectId
+
+
+def ingredient(index: int) -> dict:
+    return {
+        "name": f"ingrediente {index}",
+        "optional": index % 7 == 0,
+        "quantity_si": 0.25 * (index % 8 + 1),
+        "unit_si": "kg",
+        "quantity_equivalence": index % 4 + 1,
+        "unit_equivalence": "taza",
+    }
+
+
+def document(preparations: int, ingredients: int, steps: int, text: int) -> dict:
+    # shaped like a stored recipe as returned by pymongo
+    name = "abcdef0123456789" * 4
+    return {
+        "_id": ObjectId(),
+        "name": "Sopa de maní",
+        "description": "Receta tradicional de Cochabamba. " * text,
+        "lang": "es",
+        "owner": "cocinero",
+        "publisher": "cocinero#0001",
+        "tags": ["sopa", "tradicional", "carne"],
+        "year": 1980,
+        "location": "Cochabamba",
+        "category": ["sopa"],
+        "portion": 6,
+        "preparation_time_minutes": 90,
+        "score": 4,
+        "preparation": [
+            {
+                "name": f"parte {part}",
+                "ingredients": [ingredient(index) for index in range(ingredients)],
+                "steps": [
+                    {"detail": f"Paso {index}: hervir y mezclar a fuego lento."}
+                    for index in range(steps)
+                ],
+            }
+            for part in range(preparations)
+        ],
+        "image": {
+            "name": f"{name}.jpeg",
+            "url": f"https://storage.googleapis.com/bucket/{name}.jpeg",
+            "content_type": "image/jpeg",
+            "variants": [
+                {
+                    "name": f"{name}.jpeg.{width}w.webp",
+                    "url": f"https://storage.googleapis.com/bucket/{name}.jpeg.{width}w.webp",
+                    "content_type": "image/webp",
+                    "width": width,
+                }
+                for width in (320, 640, 1280)
+            ],
+        },
+        "published": True,
+        "reviewed": True,
+        "lat": -17.39,
+        "lng": -66.16,
+        "elevation": 2558.0,
+        "disabled": False,
+        "date_insert": datetime(2023, 5, 1, 12, 30),
+        "date_update": datetime(2023, 6, 1, 8, 15),
+        "username_insert": "cocinero#0001",
+        "username_update": "cocinero#0001",
+    }
+
+
+SIZES = {
+    "small": document(1, 3, 2, 1),
+    "typical": document(2, 10, 8, 4),
+    "huge": document(10, 50, 40, 200),
+}
+PAGE_SIZE = 20
+
+
+def cases() -> dict:
+    object_id = TypeAdapter(PyObjectId)
+    value = ObjectId()
+    text = str(value)
+    response_field = create_response_field(name="response", type_=RecipePublic)
+    loop = asyncio.new_event_loop()
+
+    def encode_response(public: RecipePublic):
+        # the work FastAPI does for a route declared with response_model
+        content = loop.run_until_complete(
+            serialize_response(
+                field=response_field, response_content=public, is_coroutine=True
+            )
+        )
+        return JSONResponse(content=content).body
+
+    items = {
+        "PyObjectId from ObjectId": lambda: object_id.validate_python(value),
+        "PyObjectId from str": lambda: object_id.validate_python(text),
+    }
+    for size, find in SIZES.items():
+        recipe = Recipe(**find)
+        public = RecipePublic(content=[recipe] * PAGE_SIZE, total=PAGE_SIZE)
+        items[f"Recipe(**find) {size}"] = lambda find=find: Recipe(**find)
+        items[f"RecipeInDB round trip {size}"] = lambda recipe=recipe: RecipeInDB(
+            **recipe.model_dump(by_alias=True)
+        )
+        items[f"RecipePublic response {size}"] = lambda public=public: (
+            encode_response(public)
+        )
+    return items
+
+
+def measure(call, rounds: int, min_time: float) -> dict:
+    # calibrate the batch so one round lasts at least min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        timings.append((time.perf_counter() - start) / number)
+    median = statistics.median(timings)
+    return {
+        "median_us": median * 1e6,
+        "min_us": min(timings) * 1e6,
+        "stdev_us": statistics.stdev(timings) * 1e6 if rounds > 1 else 0,
+        "ops_per_second": 1 / median,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model validation micro-benchmarks")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--filter", default="", help="only run matching cases")
+    parser.add_argument("--save", help="write the report as a baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+
+    report = {
+        "python": platform.python_version(),
+        "pydantic": pydantic.VERSION,
+        "results": {},
+    }
+    for name, call in cases().items():
+        if args.filter not in name:
+            continue
+        result = measure(call, args.rounds, args.min_time)
+        report["results"][name] = result
+        line = (
+            f"{name:<36} {result['median_us']:>12.2f} us "
+            f"± {result['stdev_us']:>9.2f} {result['ops_per_second']:>12.0f} ops/s"
+        )
+        previous = baseline.get(name)
+        if previous is not None:
+            line += f"  {previous['median_us'] / result['median_us']:>6.2f}x"
+        print(line)
+
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
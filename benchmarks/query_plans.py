@@ -0,0 +1,381 @@
+import argparse
+import json
+import sys
+
+from bson import ObjectId
+from pymongo import monitoring
+
+from app.utils.review_state import ReviewState
+
+COMMANDS = ("find", "aggregate", "count", "findAndModify", "update", "delete")
+# keys added by the driver that cannot be sent back inside explain
+DRIVER_KEYS = ("$db", "lsid", "$clusterTime", "$readPreference", "txnNumber")
+
+
+class Recorder(monitoring.CommandListener):
+    def __init__(self):
+        self.label: str | None = None
+        self.commands: list[tuple[str, str, str, dict]] = []
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if self.label is None or event.command_name not in COMMANDS:
+            return
+        command = {
+            key: value for key, value in event.command.items() if key not in DRIVER_KEYS
+        }
+        self.commands.append(
+            (self.label, event.database_name, event.command_name, command)
+        )
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# must be registered before the application creates its client
+RECORDER = Recorder()
+monitoring.register(RECORDER)
+
+
+def plan_stats(explain) -> tuple[list[str], int]:
+    stages = []
+    examined = 0
+
+    def walk(value):
+        nonlocal examined
+        if isinstance(value, dict):
+            for key, item in value.items():
+                # only the plan that actually ran is relevant
+                if key in ("rejectedPlans", "allPlansExecution"):
+                    continue
+                if key == "stage" and isinstance(item, str):
+                    stages.append(item)
+                elif key in ("totalDocsExamined", "docsExamined"):
+                    examined = max(examined, int(item))
+                else:
+                    walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(explain)
+    return stages, examined
+
+
+# the review states listed by /api/recipe/user/public
+USER_STATES = [
+    ("published", True, ReviewState.IGNORE),
+    ("rejected", False, ReviewState.REVIEWED),
+    ("not_reviewed", False, ReviewState.NOT_REVIEWED),
+    ("not_requested", False, ReviewState.NOT_REQUESTED),
+]
+
+
+def create_indexes():
+    from app.services.blob import BlobService
+    from app.services.job import JobService
+    from app.services.page import PageService
+    from app.services.recipe import RecipeService
+    from app.services.recipe_card import RecipeCardService
+    from app.services.token import TokenService
+    from app.services.token_public import TokenPublicService
+    from app.services.user import UserService
+
+    RecipeService.create_indexes()
+    RecipeCardService.create_indexes()
+    BlobService.create_indexes()
+    JobService.create_indexes()
+    PageService.create_indexes()
+    TokenService.create_indexes()
+    TokenPublicService.create_indexes()
+    UserService.create_indexes()
+
+
+def checks(db) -> list[tuple[str, object, str | None]]:
+    from app.services.page import PageService
+    from app.services.recipe import RecipeService
+    from app.services.recipe_facets import RecipeFacetService
+    from app.services.token import TokenService
+    from app.services.token_public import TokenPublicService
+    from app.services.user import UserService
+    from app.models.recipe import RecipeInDB
+    from app.utils.exclusion_fields import RESULT_FORMAT
+    from app.models.token import Token
+    from app.models.user import UserInDB
+
+    recipe = db.recipe.find_one({"disabled": False, "published": True})
+    publisher = recipe["publisher"]
+    page = db.pages.find_one({"disabled": False})
+    token = db.token.find_one({"disabled": False})
+    token_public = db.token_public.find_one({"disabled": False})
+    user = db.user.find_one({"disabled": False})
+    missing = RecipeInDB(**{"_id": ObjectId(), "publisher": publisher})
+    tags = {"tags": {"$all": [recipe["tags"][0]]}}
+    regex = "unanchored case-insensitive regex"
+    card = RESULT_FORMAT.RECIPE_PUBLIC_SEARCH
+
+    # label, call, reason the shape is allowed to exceed the budget
+    return [
+        ("RecipeService.get", lambda: RecipeService.get(recipe["_id"]), None),
+        (
+            "RecipeService.get_id_and_user",
+            lambda: RecipeService.get_id_and_user(recipe["_id"], publisher),
+            None,
+        ),
+        (
+            "RecipeService.get_public",
+            lambda: RecipeService.get_public(recipe["_id"]),
+            None,
+        ),
+        ("RecipeService.list", lambda: RecipeService.list(), None),
+        ("RecipeService.list_public", lambda: RecipeService.list_public(), None),
+        (
+            "RecipeService.list_public tags",
+            lambda: RecipeService.list_public(filters=tags),
+            None,
+        ),
+        (
+            "RecipeService.list_public cards",
+            lambda: RecipeService.list_public(exclude_fields=card),
+            None,
+        ),
+        (
+            "RecipeService.list_public cards tags",
+            lambda: RecipeService.list_public(exclude_fields=card, filters=tags),
+            None,
+        ),
+        *[
+            (
+                f"RecipeService.list_public publisher {state}",
+                lambda published=published, reviewed=reviewed: (
+                    RecipeService.list_public(
+                        published=published, publisher=publisher, reviewed=reviewed
+                    )
+                ),
+                None,
+            )
+            for state, published, reviewed in USER_STATES
+        ],
+        ("RecipeService.search", lambda: RecipeService.search("salteña"), None),
+        (
+            "RecipeService.search_public",
+            lambda: RecipeService.search_public("salteña"),
+            None,
+        ),
+        (
+            "RecipeService.search_public publisher",
+            lambda: RecipeService.search_public(
+                "salteña", published=False, publisher=publisher
+            ),
+            None,
+        ),
+        ("RecipeService.count", lambda: RecipeService.count(), None),
+        (
+            "RecipeService.count search",
+            lambda: RecipeService.count("sopa"),
+            "counts every match",
+        ),
+        ("RecipeService.count_public", lambda: RecipeService.count_public(), None),
+        (
+            "RecipeService.count_public publisher",
+            lambda: RecipeService.count_public(
+                published=False,
+                publisher=publisher,
+                reviewed=ReviewState.NOT_REVIEWED,
+            ),
+            None,
+        ),
+        (
+            "RecipeService.count_public tags",
+            lambda: RecipeService.count_public(filters=tags),
+            "counts every match",
+        ),
+        (
+            "RecipeService.count_public search",
+            lambda: RecipeService.count_public("sopa"),
+            "counts every match",
+        ),
+        (
+            "RecipeService.facets",
+            lambda: RecipeService.facets(filters=tags),
+            "aggregates every match",
+        ),
+        (
+            "RecipeFacetService.snapshot",
+            lambda: RecipeFacetService.aggregate(
+                {"disabled": False, "published": True}
+            ),
+            "aggregates every published recipe",
+        ),
+        (
+            "RecipeService.search_by_name",
+            lambda: RecipeService.search_by_name("chairo"),
+            None,
+        ),
+        (
+            "RecipeService.list_random",
+            lambda: RecipeService.list_random(n_per_page=10),
+            "$sample reads every match",
+        ),
+        (
+            "RecipeService.publish",
+            lambda: RecipeService.publish(item=missing, published=True),
+            None,
+        ),
+        (
+            "RecipeService.to_review_id_and_user",
+            lambda: RecipeService.to_review_id_and_user(item=missing),
+            None,
+        ),
+        (
+            "RecipeService.update_image_variants",
+            lambda: RecipeService.update_image_variants("missing.jpeg", []),
+            None,
+        ),
+        (
+            "RecipeService.near_public",
+            lambda: RecipeService.near_public(
+                recipe["lat"], recipe["lng"], 5000, n_per_page=10
+            ),
+            None,
+        ),
+        (
+            "RecipeService.within_public",
+            lambda: RecipeService.within_public(
+                recipe["lat"] - 0.01,
+                recipe["lng"] - 0.01,
+                recipe["lat"] + 0.01,
+                recipe["lng"] + 0.01,
+            ),
+            None,
+        ),
+        ("PageService.get", lambda: PageService.get(page["_id"]), None),
+        ("PageService.list", lambda: PageService.list(), None),
+        ("PageService.search", lambda: PageService.search("pagina-1"), regex),
+        (
+            "PageService.get_by_slug",
+            lambda: PageService.get_by_slug(page["slug"]),
+            None,
+        ),
+        (
+            "TokenService.get_by_id_and_user",
+            lambda: TokenService.get_by_id_and_user(Token(**token)),
+            None,
+        ),
+        (
+            "TokenService.get_token",
+            lambda: TokenService.get_token(Token(**token)),
+            None,
+        ),
+        ("TokenService.get", lambda: TokenService.get(token["username"]), None),
+        (
+            "TokenService.search",
+            lambda: TokenService.search(
+                Token(username=token["username"], token=token["token"][:4])
+            ),
+            None,
+        ),
+        (
+            "TokenPublicService.get_by_jti",
+            lambda: TokenPublicService.get_by_jti(token_public["jti"]),
+            None,
+        ),
+        (
+            "TokenPublicService.delete_by_jti",
+            lambda: TokenPublicService.delete_by_jti("missing"),
+            None,
+        ),
+        (
+            "UserService.get_user",
+            lambda: UserService.get_user(UserInDB(**user)),
+            None,
+        ),
+        (
+            "UserService.get_user_public",
+            lambda: UserService.get_user_public(user["username"]),
+            None,
+        ),
+        (
+            "UserService.exists_username",
+            lambda: UserService.exists_username(user["username"]),
+            None,
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query plan regression checks")
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=1000,
+        help="maximum documents examined by a bounded query shape",
+    )
+    parser.add_argument(
+        "--generate",
+        type=int,
+        default=0,
+        help="bulk load this many synthetic recipes before checking",
+    )
+    parser.add_argument("--publishers", type=int, default=5000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from app.core.database import db, get_client
+    from benchmarks import catalog
+
+    if args.generate > 0:
+        catalog.generate(db, args.generate, args.publishers)
+    create_indexes()
+
+    items = checks(db)
+    for label, call, _ in items:
+        RECORDER.label = label
+        try:
+            call()
+        finally:
+            RECORDER.label = None
+    allowed = {label: reason for label, _, reason in items}
+
+    results = []
+    failed = False
+    for label, database_name, command_name, command in RECORDER.commands:
+        explain = get_client()[database_name].command(
+            "explain", command, verbosity="executionStats"
+        )
+        stages, examined = plan_stats(explain)
+        reason = allowed[label]
+        errors = []
+        if "COLLSCAN" in stages:
+            errors.append("COLLSCAN")
+        if reason is None and examined > args.budget:
+            errors.append(f"examined {examined} > {args.budget}")
+        failed = failed or len(errors) > 0
+        results.append(
+            {
+                "label": label,
+                "command": command_name,
+                "stages": stages,
+                "examined": examined,
+                "unbounded": reason,
+                "errors": errors,
+            }
+        )
+        status = "FAIL " + ", ".join(errors) if errors else "ok"
+        note = f" ({reason})" if reason is not None and not errors else ""
+        print(
+            f"{label:<52} {command_name:<14} {examined:>9} "
+            f"{'>'.join(dict.fromkeys(stages)):<40} {status}{note}"
+        )
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
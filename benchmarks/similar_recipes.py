@@ -0,0 +1,44 @@
+import argparse
+import resource
+import time
+
+from app.recommendations.similar import block_rows, neighbours, vectorize
+from benchmarks.catalog import recipes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Similar recipes computation on a synthetic catalog, no MongoDB"
+    )
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--publishers", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--block-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    # catalog documents get their _id on insert
+    documents = [
+        {**document, "_id": id}
+        for id, document in enumerate(recipes(args.recipes, args.publishers))
+    ]
+    start = time.perf_counter()
+    ids, matrix = vectorize(documents)
+    vectorized = time.perf_counter() - start
+    rows = block_rows(*matrix.shape, args.block_mb)
+    start = time.perf_counter()
+    found = 0
+    for _, index, score in neighbours(matrix, args.k, rows):
+        found += int((score > 0).sum())
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"recipes={len(ids)} features={matrix.shape[1]} block_rows={rows} "
+        f"vectorize={vectorized:.2f}s neighbours={elapsed:.2f}s "
+        f"per_recipe={elapsed / max(1, len(ids)) * 1e6:.0f}us "
+        f"similar={found} peak_rss={peak:.0f}MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
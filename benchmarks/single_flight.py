@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("APP_STORAGE_BACKEND", "memory")
+os.environ.setdefault("APP_JOBS_ENABLED", "false")
+os.environ.setdefault("APP_RATE_LIMIT_ENABLED", "false")
+
+from benchmarks.load_test import sample_recipe, use_stand_in
+
+
+def counters(name: str) -> tuple[float, float]:
+    from app.utils.single_flight import SINGLE_FLIGHT_CALLS, SINGLE_FLIGHT_COALESCED
+
+    calls = dict(SINGLE_FLIGHT_CALLS._merged()).get((name,), 0)
+    coalesced = dict(SINGLE_FLIGHT_COALESCED._merged()).get((name,), 0)
+    return calls, coalesced
+
+
+async def burst(client, url: str, size: int) -> float:
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[client.get(url) for _ in range(size)])
+    elapsed = time.perf_counter() - start
+    failed = [
+        response.status_code for response in responses if response.status_code >= 400
+    ]
+    if len(failed) > 0:
+        raise RuntimeError(f"{url} failed: {failed[:5]}")
+    return elapsed
+
+
+async def run(args, id: str):
+    import httpx
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        cases = [
+            ("recipe.get_public_modified", f"/api/recipe/public/{id}"),
+            ("recipe.search_public", "/api/recipe/public?search=pique"),
+            ("recipe.list_public", "/api/recipe/public?tags=sopa"),
+        ]
+        for name, url in cases:
+            before = counters(name)
+            elapsed = 0
+            for _ in range(args.bursts):
+                elapsed += await burst(client, url, args.concurrency)
+            after = counters(name)
+            calls = after[0] - before[0]
+            coalesced = after[1] - before[1]
+            print(
+                f"{name:<28} calls={calls:>6.0f} coalesced={coalesced:>6.0f} "
+                f"({coalesced / calls if calls else 0:.0%}) "
+                f"burst={elapsed / args.bursts * 1000:.1f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Identical concurrent public reads and how many were coalesced"
+    )
+    parser.add_argument("--mongo", choices=["local", "stand-in"], default="local")
+    parser.add_argument("--database", default="loadtest")
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--bursts", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.mongo == "stand-in":
+        use_stand_in()
+    os.environ["APP_MONGO_DB"] = args.database
+
+    from app.core.database import db, get_client
+    from app.migrations import recipe_cards, recipe_search_keys
+    from app.services.recipe import RecipeService
+
+    get_client().drop_database(db.name)
+    if args.mongo == "local":
+        RecipeService.create_indexes()
+    rng = random.Random(1)
+    documents = []
+    for _ in range(args.recipes):
+        document = sample_recipe(rng)
+        document.update({"disabled": False, "published": True, "publisher": "bench"})
+        documents.append(document)
+    ids = db.recipe.insert_many(documents).inserted_ids
+    recipe_search_keys.run()
+    recipe_cards.run()
+    asyncio.run(run(args, str(ids[0])))
+
+
+if __name__ == "__main__":
+    main()